@@ -18,6 +18,13 @@ app2.0.py 設計 logique 與使用者提供的 UI 視覺設計稿，旨在提供
 - [專家圖表 Pro] 為指標圖表加入關鍵水平線與 AI 註解
 - [穩定性強化] 提高數據驗證門檻
 - [專家升級] 引入動態適應功能
+- [數據匯出] 指標數據與掃描結果以 Arrow IPC / Parquet 匯出 (支援定時匯出、memory map 與欄位投影讀取)
+- [策略引擎] 宣告式策略規則 (JSON/YAML)，編譯為向量化運算，一次評分所有 K 線與標的
+- [數據金字塔] 多解析度 OHLCV 金字塔 (30m → 1h → 4h → 1d → 1wk → 1mo)，縮放圖表時自動挑選最粗的合適層級
+- [成交量分佈] 向量化 Volume Profile 引擎，增量更新並提供 POC / 價值區 (VAH/VAL) 支撐壓力
+- [共享快取] 多程序部署共用 SQLite + Arrow 快取 (原始 K 線與指標數據)，LRU 淘汰並統計跨程序命中率
+- [即時模式] 訂閱 K 線串流 (websocket 或 JSON Lines 檔案)，僅局部更新圖表與節流更新摘要
+- [數據驗證] 指標計算前的向量化正規化 (欄位攤平、時區/交易時段、亂序重複、停滯 K 線、分割檢查) 與檢查計數
 
 開發者：程式碼專家 (Generated by Gemini)
 版本：12.2.0 (Final Stable)
@@ -25,6 +32,8 @@ app2.0.py 設計 logique 與使用者提供的 UI 視覺設計稿，旨在提供
 
 # 載入核心套件
 import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import yfinance as yf
 import pandas as pd
 import numpy as np
@@ -34,8 +43,18 @@ import ta
 import warnings
 import time
 import re 
+import os
+import json
+import atexit
+import sqlite3
+import threading
 from datetime import datetime, timedelta
 from scipy.stats import linregress
+import pyarrow as pa
+from octs_config import PERIOD_MAP
+from octs_export import EXPORT_DIR, EXPORT_FORMATS, export_path, frame_to_arrow, write_arrow_table
+from octs_validation import VALIDATION_CHECKS, normalize_ohlcv
+from octs_volume_profile import VP_VALUE_AREA, VP_WINDOW, scan_volume_profiles, update_volume_profile, volume_profile_levels
 # 忽略所有警告，使輸出更乾淨
 warnings.filterwarnings('ignore')
 
@@ -43,13 +62,7 @@ warnings.filterwarnings('ignore')
 # 1. 頁面配置與全局設定
 # ==============================================================================
 
-# 週期映射：(YFinance Period, YFinance Interval)
-PERIOD_MAP = { 
-    "30 分": ("60d", "30m"), 
-    "4 小時": ("1y", "60m"), 
-    "1 日": ("5y", "1d"), 
-    "1 週": ("max", "1wk")
-}
+# 週期映射：(YFinance Period, YFinance Interval)，定義於 octs_config (與 loadtest.py 共用)
 
 # 🚀 您的【所有資產清單】 (僅示範用，可擴充)
 FULL_SYMBOLS_MAP = {
@@ -62,6 +75,16 @@ FULL_SYMBOLS_MAP = {
     "ETH-USD": {"name": "以太坊", "keywords": ["以太坊", "ETH"]},
 }
 
+# 快取設定：st.cache_data (程序內) 與跨程序共享快取使用相同的 4 小時 TTL
+CACHE_TTL_SECONDS = 60*60*4
+SHARED_CACHE_PATH = os.environ.get("OCTS_SHARED_CACHE", os.path.join(".octs_cache", "shared_cache.sqlite"))
+SHARED_CACHE_MAX_BYTES = 512 * 1024 * 1024
+SHARED_CACHE_FLUSH_SECONDS = 5   # 命中統計批次寫入間隔
+SHARED_CACHE_TOUCH_SECONDS = 60  # LRU 存取時間的最短更新間隔
+
+# 數據驗證門檻 (市場時區、交易時段與各項檢查定義於 octs_validation)
+MIN_VALID_BARS = 20
+
 # 技術指標參數設定 (核心策略邏輯)
 MACD_FAST = 9
 MACD_SLOW = 16
@@ -74,6 +97,130 @@ STOCH_D_PERIOD = 3
 STOCH_OVERSOLD = 20
 STOCH_OVERBOUGHT = 80
 
+# 成交量分佈 (Volume Profile) 參數：VP_WINDOW / VP_BINS / VP_VALUE_AREA 定義於 octs_volume_profile
+
+# 多解析度 OHLCV 金字塔：下載層級 (source 為 None) 直接取自 YFinance，其餘由 source 層級聚合。
+# bar 為單根 K 線時長；lookback 為資料來源可回溯的長度 (None 表示完整歷史)。
+PYRAMID_LEVELS = {
+    "30m": {"source": None, "period": "60d", "interval": "30m", "refresh_period": "5d",
+            "refresh_seconds": 30*60, "lookback": pd.Timedelta(days=59), "bar": pd.Timedelta(minutes=30)},
+    "1h": {"source": None, "period": "730d", "interval": "60m", "refresh_period": "1mo",
+           "refresh_seconds": 60*60, "lookback": pd.Timedelta(days=729), "bar": pd.Timedelta(hours=1)},
+    "4h": {"source": "1h", "rule": "4h", "bar": pd.Timedelta(hours=4)},
+    "1d": {"source": None, "period": "max", "interval": "1d", "refresh_period": "3mo",
+           "refresh_seconds": 60*60*4, "lookback": None, "bar": pd.Timedelta(days=1)},
+    "1wk": {"source": "1d", "rule": "W-MON", "bar": pd.Timedelta(weeks=1)},
+    "1mo": {"source": "1d", "rule": "MS", "bar": pd.Timedelta(days=30)},
+}
+PYRAMID_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+PYRAMID_MAX_POINTS = 600    # 圖表目標 K 線數 (數據量與檢視長度無關)
+PYRAMID_WARMUP_BARS = 100   # 指標暖機所需的額外 K 線
+# 圖表視窗 (天數)：None 表示使用分析週期的完整數據
+CHART_WINDOWS = {
+    "完整週期": None,
+    "1 週": 7,
+    "1 個月": 30,
+    "6 個月": 182,
+    "1 年": 365,
+    "3 年": 365*3,
+    "10 年": 365*10,
+    "全部歷史": 365*100,
+}
+
+# 即時模式 (Live Mode) 設定
+LIVE_TIMEFRAMES = ["30 分"]             # 支援即時監控的週期
+LIVE_DEFAULT_SOURCE = "live_bars.jsonl"  # 預設 K 線來源 (JSON Lines 檔案；亦可為 ws:// URL)
+LIVE_REFRESH_SECONDS = 2                 # 即時片段輪詢間隔
+LIVE_SUMMARY_THROTTLE_SECONDS = 10       # 摘要卡片最短更新間隔
+LIVE_WINDOW_BARS = 120                   # 即時圖表顯示的 K 線數 (固定，與歷史長度無關)
+LIVE_WARMUP_BARS = 300                   # 增量計算指標所保留的尾段 K 線數
+LIVE_FEED_BUFFER = 5000                  # websocket 訊息緩衝上限
+# 即時圖表 trace 名稱 → 指標欄位
+LIVE_TRACE_COLUMNS = {
+    'RSI': 'RSI',
+    'MACD 柱': 'MACD_Hist',
+    'MACD': 'MACD',
+    'Signal': 'MACD_Signal',
+    'ADX': 'ADX_9',
+    'CMF': 'CMF',
+    'Stoch %K': 'Stoch_%K',
+    'Stoch %D': 'Stoch_%D',
+}
+
+# 策略規則 (宣告式)：可於 strategy_rules/ 目錄放置 JSON/YAML 規則檔進行 A/B 測試。
+# - 每條規則依序比對 branches，命中第一個分支即取其權重與理由 (等同 if/elif)，皆未命中則取 otherwise
+# - 條件為 [左值, 運算子, 右值] 三元組，同一分支內的條件以 AND 串接
+# - 左右值可為指標欄位名稱、thresholds 中的參數名稱或數字；理由字串可引用 {thresholds} 參數
+# - actions 以最終分數 Score 判斷行動建議，皆未命中則取 default_action
+STRATEGY_RULES_DIR = "strategy_rules"
+# 規則可引用的欄位 (OHLCV 與 add_technical_indicators 產生的指標)，編譯時即檢查拼字錯誤
+STRATEGY_COLUMNS = {'Open', 'High', 'Low', 'Close', 'Volume',
+                    'MACD', 'MACD_Signal', 'MACD_Hist', 'RSI', 'ADX_9', 'CMF', 'Stoch_%K', 'Stoch_%D'}
+DEFAULT_STRATEGY_RULES = {
+    "name": "多週期趨勢確認 (內建預設)",
+    "thresholds": {
+        "rsi_oversold": RSI_OVERSOLD,
+        "rsi_overbought": RSI_OVERBOUGHT,
+        "adx_trend": 25,
+        "stoch_oversold": STOCH_OVERSOLD,
+        "stoch_overbought": STOCH_OVERBOUGHT,
+    },
+    "rules": [
+        {
+            "name": "MACD",
+            "branches": [
+                {"when": [["MACD_Hist", ">", 0], ["MACD", ">", "MACD_Signal"]], "weight": 1,
+                 "reason": "MACD: 多頭訊號 (柱狀圖翻紅，MACD 線上穿 Signal 線)。"},
+                {"when": [["MACD_Hist", "<", 0], ["MACD", "<", "MACD_Signal"]], "weight": -1,
+                 "reason": "MACD: 空頭訊號 (柱狀圖翻綠，MACD 線下穿 Signal 線)。"},
+            ],
+            "otherwise": {"weight": 0, "reason": "MACD: 盤整或不明確。"},
+        },
+        {
+            "name": "RSI",
+            "branches": [
+                {"when": [["RSI", "<=", "rsi_oversold"]], "weight": 1,
+                 "reason": "RSI: 超賣區間 ({rsi_oversold} 以下)，存在反彈潛力。"},
+                {"when": [["RSI", ">=", "rsi_overbought"]], "weight": -1,
+                 "reason": "RSI: 超買區間 ({rsi_overbought} 以上)，存在回調風險。"},
+            ],
+            "otherwise": {"weight": 0, "reason": "RSI: 處於中性區間 ({rsi_oversold}-{rsi_overbought})。"},
+        },
+        {
+            "name": "ADX",
+            "branches": [
+                {"when": [["ADX_9", ">", "adx_trend"]], "weight": 0,
+                 "reason": "ADX: 趨勢強勁，當前趨勢可靠度高。"},
+            ],
+            "otherwise": {"weight": 0, "reason": "ADX: 趨勢微弱，價格可能處於盤整。"},
+        },
+        {
+            "name": "CMF",
+            "branches": [
+                {"when": [["CMF", ">", 0]], "weight": 0.5, "reason": "CMF: 資金持續流入 (數值 > 0)。"},
+                {"when": [["CMF", "<", 0]], "weight": -0.5, "reason": "CMF: 資金持續流出 (數值 < 0)。"},
+            ],
+            "otherwise": {"weight": 0, "reason": "CMF: 資金流向不明顯。"},
+        },
+        {
+            "name": "Stoch",
+            "branches": [
+                {"when": [["Stoch_%K", "<", "stoch_oversold"], ["Stoch_%K", ">", "Stoch_%D"]], "weight": 1,
+                 "reason": "Stoch: 接近超賣區並形成金叉，多頭動能啟動。"},
+                {"when": [["Stoch_%K", ">", "stoch_overbought"], ["Stoch_%K", "<", "Stoch_%D"]], "weight": -1,
+                 "reason": "Stoch: 接近超買區並形成死叉，空頭動能啟動。"},
+            ],
+            "otherwise": {"weight": 0, "reason": "Stoch: 中性或盤整信號。"},
+        },
+    ],
+    "actions": [
+        {"when": [["Score", ">=", 2]], "label": "買入 (Buy)", "color": "#28a745"},
+        {"when": [["Score", "<=", -2]], "label": "賣出 (Sell)", "color": "#dc3545"},
+    ],
+    "default_action": {"label": "觀望 (Wait)", "color": "#ffc107"},
+}
+
+
 # --- 顏色與樣式定義 (採用新的 UI 視覺設計) ---
 MAIN_COLOR = "#cf6955"  # 泰倫聯邦主色：鮭魚粉/珊瑚紅
 ACCENT_COLOR = "#e9967a" # 泰倫聯邦輔色：亮鮭魚色
@@ -190,121 +337,535 @@ h1 {{
 # 2. 數據獲取與處理
 # ==============================================================================
 
-@st.cache_data(ttl=60*60*4) # 4小時緩存
-def fetch_data(symbol, period, interval):
+def add_technical_indicators(df):
     """
-    從 YFinance 獲取歷史數據，並添加技術指標。
+    於 OHLCV 數據上計算所有核心技術指標 (就地新增欄位並回傳)。
+    """
+    # 1. MACD (Moving Average Convergence Divergence)
+    df['MACD'] = ta.trend.macd(df['Close'], window_fast=MACD_FAST, window_slow=MACD_SLOW, fillna=True)
+    df['MACD_Signal'] = ta.trend.macd_signal(df['Close'], window_fast=MACD_FAST, window_slow=MACD_SLOW, window_sign=MACD_SIGNAL, fillna=True)
+    df['MACD_Hist'] = ta.trend.macd_diff(df['Close'], window_fast=MACD_FAST, window_slow=MACD_SLOW, window_sign=MACD_SIGNAL, fillna=True)
+
+    # 2. RSI (Relative Strength Index)
+    df['RSI'] = ta.momentum.rsi(df['Close'], window=RSI_PERIOD, fillna=True)
+    
+    # 3. ADX/CCI (Trend & Momentum) - 使用 ADX 作為趨勢強度
+    df['ADX_9'] = ta.trend.adx(df['High'], df['Low'], df['Close'], window=9, fillna=True)
+    
+    # 4. CMF (Chaikin Money Flow) - 資金流向
+    df['CMF'] = ta.volume.chaikin_money_flow(df['High'], df['Low'], df['Close'], df['Volume'], window=20, fillna=True)
+
+    # 5. Stochastic Oscillator (Stochastics)
+    df['Stoch_%K'] = ta.momentum.stoch(df['High'], df['Low'], df['Close'], window=STOCH_K_PERIOD, fillna=True)
+    df['Stoch_%D'] = ta.momentum.stoch_signal(df['High'], df['Low'], df['Close'], window=STOCH_K_PERIOD, smooth_window=STOCH_D_PERIOD, fillna=True)
+
+    return df
+
+# --- 跨程序共享快取 (SQLite + Arrow IPC) ---
+
+@st.cache_resource
+def _shared_cache_connection():
+    """
+    每個伺服器程序一條 SQLite 連線 (WAL 模式：讀取不需鎖定，寫入以交易保證原子性)。
+    另回傳程序內待寫入的命中統計；統計與 LRU 存取時間皆節流寫入，讀取路徑不必每次取得寫入鎖。
+    """
+    os.makedirs(os.path.dirname(SHARED_CACHE_PATH) or ".", exist_ok=True)
+    conn = sqlite3.connect(SHARED_CACHE_PATH, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY, kind TEXT NOT NULL, payload BLOB NOT NULL, size INTEGER NOT NULL,
+            writer_pid INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stats (
+            pid INTEGER NOT NULL, kind TEXT NOT NULL, hits INTEGER NOT NULL DEFAULT 0,
+            cross_hits INTEGER NOT NULL DEFAULT 0, misses INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (pid, kind))
+    """)
+    lock = threading.Lock()
+    pending = {'stats': {}, 'flushed': time.time()}
+    # 程序正常結束時寫出剩餘的統計
+    atexit.register(lambda: _flush_cache_stats(conn, lock, pending, force=True))
+    return conn, lock, pending
+
+def _frame_to_ipc(df):
+    """DataFrame → Arrow IPC stream bytes (保留索引)。"""
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _ipc_to_frame(payload):
+    return pa.ipc.open_stream(pa.py_buffer(payload)).read_all().to_pandas()
+
+def _record_cache_stat(pending, kind, hits=0, cross_hits=0, misses=0):
+    """累加程序內的命中統計 (呼叫端持有 lock)，由 _flush_cache_stats 批次寫入。"""
+    counts = pending['stats'].setdefault(kind, [0, 0, 0])
+    counts[0] += hits
+    counts[1] += cross_hits
+    counts[2] += misses
+
+def _flush_cache_stats(conn, lock, pending, force=False):
+    """每 SHARED_CACHE_FLUSH_SECONDS 秒將累積的命中統計以單一交易寫入 stats 表。"""
+    with lock:
+        if not pending['stats'] or (not force and time.time() - pending['flushed'] < SHARED_CACHE_FLUSH_SECONDS):
+            return
+        rows = [(os.getpid(), kind, *counts) for kind, counts in pending['stats'].items()]
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("""
+                INSERT INTO stats (pid, kind, hits, cross_hits, misses) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (pid, kind) DO UPDATE SET
+                    hits = hits + excluded.hits, cross_hits = cross_hits + excluded.cross_hits, misses = misses + excluded.misses
+            """, rows)
+            conn.execute("COMMIT")
+        except Exception:
+            # BEGIN IMMEDIATE 本身失敗 (例如資料庫被鎖定) 時沒有交易可回復，保留原始例外
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        pending['stats'].clear()
+        pending['flushed'] = time.time()
+
+def shared_cache_get(kind, key):
+    """
+    讀取共享快取 (不開啟交易，WAL 模式下不會阻擋其他程序)；過期 (超過 CACHE_TTL_SECONDS) 視為未命中，
+    由寫入端清除。共享快取無法使用 (鎖定、損毀等) 時同樣視為未命中。命中時回傳的 DataFrame 以 attrs['cache_created'] 記錄數據的產生時間，
+    LRU 存取時間僅在超過 SHARED_CACHE_TOUCH_SECONDS 未更新時才寫回。
+    若資料由其他程序寫入則計為跨程序命中。
     """
     try:
+        conn, lock, pending = _shared_cache_connection()
+        now = time.time()
+        with lock:
+            row = conn.execute("SELECT payload, writer_pid, created, accessed FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[2] > CACHE_TTL_SECONDS:
+                _record_cache_stat(pending, kind, misses=1)
+                row = None
+            else:
+                _record_cache_stat(pending, kind, hits=1, cross_hits=int(row[1] != os.getpid()))
+                if now - row[3] > SHARED_CACHE_TOUCH_SECONDS:
+                    conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        _flush_cache_stats(conn, lock, pending)
+        if row is None:
+            return None
+
+        df = _ipc_to_frame(row[0])
+    except (sqlite3.Error, pa.ArrowException):
+        return None
+    df.attrs['cache_created'] = row[2]
+    return df
+
+def shared_cache_put(kind, key, df, created=None):
+    """
+    寫入共享快取 (單一交易內完成覆寫與 LRU 淘汰，其他程序不會讀到半寫入的資料)。
+    created 為數據的產生時間：由其他快取數據衍生時傳入來源的時間，使衍生數據與來源同時過期。
+    總大小超過 SHARED_CACHE_MAX_BYTES 時，依最久未存取的順序淘汰。
+    """
+    payload = _frame_to_ipc(df)
+    conn, lock, _ = _shared_cache_connection()
+    now = time.time()
+    created = now if created is None else created
+    with lock:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM entries WHERE created < ?", (now - CACHE_TTL_SECONDS,))
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, kind, payload, size, writer_pid, created, accessed) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, payload, len(payload), os.getpid(), created, now),
+            )
+            excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0] - SHARED_CACHE_MAX_BYTES
+            if excess > 0:
+                for victim, size in conn.execute("SELECT key, size FROM entries WHERE key != ? ORDER BY accessed", (key,)).fetchall():
+                    conn.execute("DELETE FROM entries WHERE key = ?", (victim,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+            conn.execute("COMMIT")
+        except Exception:
+            # BEGIN IMMEDIATE 本身失敗 (例如資料庫被鎖定) 時沒有交易可回復，保留原始例外
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+def shared_cache_stats():
+    """各程序、各類別的共享快取命中統計 (含跨程序命中率；本程序尚未寫入的統計一併計入)。"""
+    conn, lock, pending = _shared_cache_connection()
+    with lock:
+        stats = pd.read_sql_query("SELECT pid, kind, hits, cross_hits, misses FROM stats ORDER BY pid, kind", conn)
+        entries = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        unflushed = pd.DataFrame([(os.getpid(), kind, *counts) for kind, counts in pending['stats'].items()],
+                                 columns=['pid', 'kind', 'hits', 'cross_hits', 'misses'])
+    if not unflushed.empty:
+        stats = pd.concat([stats, unflushed]).groupby(['pid', 'kind'], as_index=False).sum()
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = (stats['hits'] / lookups.where(lookups > 0)).fillna(0.0)
+    stats['cross_hit_rate'] = (stats['cross_hits'] / lookups.where(lookups > 0)).fillna(0.0)
+    return stats, {"entries": entries[0], "bytes": entries[1]}
+
+def download_bars(symbol, period, interval):
+    """
+    下載原始 K 線；同主機上的所有伺服器程序透過共享快取共用同一份下載結果。
+    回傳的 DataFrame 以 attrs['cache_created'] 記錄下載時間。
+    """
+    key = f"bars|{symbol}|{period}|{interval}"
+    data = shared_cache_get("bars", key)
+    if data is None:
         # 使用 pbar=False 避免 Streamlit 警告
         data = yf.download(symbol, period=period, interval=interval, progress=False)
+        data.attrs['cache_created'] = time.time()
+        if not data.empty:
+            try:
+                shared_cache_put("bars", key, data, created=data.attrs['cache_created'])
+            except sqlite3.Error:
+                pass  # 共享快取暫時無法寫入 (例如被其他程序鎖定)：略過寫入，不影響本次結果
+    return data
+
+def fetch_data(symbol, period, interval):
+    """
+    從 YFinance 獲取歷史數據，並添加技術指標。
+    程序內由 st.cache_data 快取，跨程序由共享快取提供原始 K 線與指標數據；
+    數據自原始 K 線下載起超過 CACHE_TTL_SECONDS 即重新取得 (不論經過幾層快取)。
+    """
+    df, status_message = _fetch_data_cached(symbol, period, interval)
+    if time.time() - df.attrs.get('cache_created', time.time()) > CACHE_TTL_SECONDS:
+        _fetch_data_cached.clear(symbol, period, interval)
+        df, status_message = _fetch_data_cached(symbol, period, interval)
+    return df, status_message
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS) # 4小時緩存
+def _fetch_data_cached(symbol, period, interval):
+    try:
+        indicators_key = f"indicators|{symbol}|{period}|{interval}"
+        cached = shared_cache_get("indicators", indicators_key)
+        if cached is not None:
+            return cached, "✅ 數據同步成功。"
+
+        data = download_bars(symbol, period, interval)
+        created = data.attrs['cache_created']
+
+        # --- 數據驗證與正規化 (缺值、異常 K 線在此剔除，指標計算後不再 dropna 以免掩蓋缺口) ---
+        df, checks = normalize_ohlcv(data, symbol, interval)
         
-        if data.empty or len(data) < 20: # 提高數據驗證門檻
+        if df.empty or len(df) < MIN_VALID_BARS: # 提高數據驗證門檻
             return pd.DataFrame(), f"❌ 錯誤：數據不足或代號錯誤 ({symbol})。請檢查代碼或調整時間週期。"
 
-        df = data.copy()
-        
         # --- 核心技術指標計算 ---
-        # 1. MACD (Moving Average Convergence Divergence)
-        df['MACD'] = ta.trend.macd(df['Close'], window_fast=MACD_FAST, window_slow=MACD_SLOW, fillna=True)
-        df['MACD_Signal'] = ta.trend.macd_signal(df['Close'], window_fast=MACD_FAST, window_slow=MACD_SLOW, window_sign=MACD_SIGNAL, fillna=True)
-        df['MACD_Hist'] = ta.trend.macd_diff(df['Close'], window_fast=MACD_FAST, window_slow=MACD_SLOW, window_sign=MACD_SIGNAL, fillna=True)
+        df = add_technical_indicators(df)
+        df.attrs['validation'] = checks
+
+        # 指標數據由原始 K 線衍生，沿用其產生時間，兩者同時過期
+        try:
+            shared_cache_put("indicators", indicators_key, df, created=created)
+        except sqlite3.Error:
+            pass  # 共享快取暫時無法寫入：略過寫入，本次仍回傳計算結果
+        df.attrs['cache_created'] = created
+        return df, "✅ 數據同步成功。"
 
-        # 2. RSI (Relative Strength Index)
-        df['RSI'] = ta.momentum.rsi(df['Close'], window=RSI_PERIOD, fillna=True)
-        
-        # 3. ADX/CCI (Trend & Momentum) - 使用 ADX 作為趨勢強度
-        df['ADX_9'] = ta.trend.adx(df['High'], df['Low'], df['Close'], window=9, fillna=True)
-        
-        # 4. CMF (Chaikin Money Flow) - 資金流向
-        df['CMF'] = ta.volume.chaikin_money_flow(df['High'], df['Low'], df['Close'], df['Volume'], window=20, fillna=True)
+    except Exception as e:
+        return pd.DataFrame(), f"❌ 數據獲取異常: {e}"
 
-        # 5. Stochastic Oscillator (Stochastics)
-        df['Stoch_%K'] = ta.momentum.stoch(df['High'], df['Low'], df['Close'], window=STOCH_K_PERIOD, fillna=True)
-        df['Stoch_%D'] = ta.momentum.stoch_signal(df['High'], df['Low'], df['Close'], window=STOCH_K_PERIOD, smooth_window=STOCH_D_PERIOD, fillna=True)
+# --- 多解析度 OHLCV 金字塔 (Multi-resolution Pyramid) ---
+
+def _compact_ohlcv(bars):
+    """僅保留 OHLCV 欄位並以 float32 儲存價格，降低金字塔的記憶體用量。"""
+    compact = bars[PYRAMID_COLUMNS].astype({c: np.float32 for c in PYRAMID_COLUMNS if c != 'Volume'})
+    return compact[~compact.index.duplicated(keep='last')].sort_index()
+
+def _resample_ohlcv(bars, level):
+    """依層級規則將較細的 K 線聚合為較粗的 K 線 (K 線以區間起點標記)。"""
+    resampled = bars.resample(PYRAMID_LEVELS[level]['rule'], label='left', closed='left').agg({
+        'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum',
+    })
+    return resampled.dropna(subset=['Open'])
+
+def _pyramid_base(level):
+    """回傳層級的下載來源層級 (衍生層級沿 source 往下追溯)。"""
+    while PYRAMID_LEVELS[level].get('source'):
+        level = PYRAMID_LEVELS[level]['source']
+    return level
+
+def _update_derived_levels(store, level, since):
+    """只重算衍生層級中自 since 起受影響的 K 線 (從包含 since 的那根衍生 K 線開始)。"""
+    bars = store['levels'][level]
+    for derived, spec in PYRAMID_LEVELS.items():
+        if spec.get('source') != level:
+            continue
+        current = store['levels'].get(derived)
+        if current is None or current.empty:
+            store['levels'][derived] = _resample_ohlcv(bars, derived)
+            rebuild_from = bars.index[0]
+        else:
+            kept = current[current.index <= since]
+            rebuild_from = kept.index[-1] if not kept.empty else bars.index[0]
+            tail = _resample_ohlcv(bars[bars.index >= rebuild_from], derived)
+            store['levels'][derived] = pd.concat([current[current.index < rebuild_from], tail])
+        _update_derived_levels(store, derived, rebuild_from)
 
-        # 刪除所有 NaN 值，確保計算準確
-        df = df.dropna()
+def append_pyramid_bars(store, level, bars):
+    """
+    將新 K 線併入金字塔：覆蓋重疊區段，並增量更新由此層級聚合的衍生層級。
+    """
+    bars = _compact_ohlcv(bars)
+    if bars.empty:
+        return store
 
-        return df, "✅ 數據同步成功。"
+    existing = store['levels'].get(level)
+    since = bars.index[0]
+    if existing is not None and not existing.empty:
+        bars = pd.concat([existing[existing.index < since], bars])
+    store['levels'][level] = bars
 
-    except Exception as e:
-        return pd.DataFrame(), f"❌ 數據獲取異常: {e}"
+    _update_derived_levels(store, level, since)
+    return store
+
+@st.cache_resource
+def get_pyramid_store(symbol):
+    """每個標的於伺服器程序內共用一份金字塔 (跨 session、跨 rerun 增量更新)。"""
+    return {'levels': {}, 'refreshed': {}, 'lock': threading.Lock()}
+
+def ensure_pyramid_level(symbol, level):
+    """
+    確保層級數據可用：首次下載完整歷史，之後僅下載最近一小段並增量併入。
+    """
+    store = get_pyramid_store(symbol)
+    base = _pyramid_base(level)
+    spec = PYRAMID_LEVELS[base]
+
+    with store['lock']:
+        refreshed = store['refreshed'].get(base)
+        if refreshed is None or time.time() - refreshed > spec['refresh_seconds']:
+            if refreshed is None:
+                # 完整歷史透過共享快取取得；增量更新須為最新數據，直接下載
+                data = download_bars(symbol, spec['period'], spec['interval'])
+            else:
+                data = yf.download(symbol, period=spec['refresh_period'], interval=spec['interval'], progress=False)
+            if not data.empty:
+                append_pyramid_bars(store, base, normalize_ohlcv(data, symbol, spec['interval'])[0])
+            store['refreshed'][base] = time.time()
+
+    return store['levels'].get(level, pd.DataFrame(columns=PYRAMID_COLUMNS))
+
+def select_pyramid_level(start, end, max_points=PYRAMID_MAX_POINTS, now=None):
+    """
+    挑選能涵蓋 [start, end] 且解析度足夠 (K 線數不少於約 max_points) 的最粗層級，
+    使不論檢視多長的歷史，載入的數據量大致固定。
+    """
+    now = now if now is not None else pd.Timestamp.now(tz='UTC')
+    target_bar = (pd.Timestamp(end) - pd.Timestamp(start)) / max_points
+
+    # 受限於資料來源的可回溯長度 (例如 30m 僅 60 天)
+    covering = [
+        level for level in PYRAMID_LEVELS
+        if PYRAMID_LEVELS[_pyramid_base(level)]['lookback'] is None
+        or now - PYRAMID_LEVELS[_pyramid_base(level)]['lookback'] <= pd.Timestamp(start)
+    ]
+    fine_enough = [level for level in covering if PYRAMID_LEVELS[level]['bar'] <= target_bar]
+    if fine_enough:
+        return max(fine_enough, key=lambda level: PYRAMID_LEVELS[level]['bar'])
+    return min(covering, key=lambda level: PYRAMID_LEVELS[level]['bar'])
+
+def _align_timestamp(ts, index):
+    """將查詢時間轉為與索引相同的時區設定，避免 tz-aware / naive 比較錯誤。"""
+    ts = pd.Timestamp(ts)
+    tz = getattr(index, 'tz', None)
+    if tz is not None:
+        return ts.tz_localize(tz) if ts.tzinfo is None else ts.tz_convert(tz)
+    return ts.tz_convert(None) if ts.tzinfo is not None else ts
+
+def get_pyramid_frame(symbol, start, end, max_points=PYRAMID_MAX_POINTS):
+    """
+    取得 [start, end] 區間的 K 線與技術指標，自動挑選金字塔層級。
+    為使指標穩定，會多取 PYRAMID_WARMUP_BARS 根 K 線計算後再截斷。
+    回傳 (df, level)。
+    """
+    level = select_pyramid_level(start, end, max_points)
+    bars = ensure_pyramid_level(symbol, level)
+    if bars.empty:
+        return pd.DataFrame(), level
+
+    start = _align_timestamp(start, bars.index)
+    end = _align_timestamp(end, bars.index)
+    first = max(bars.index.searchsorted(start) - PYRAMID_WARMUP_BARS, 0)
+    last = bars.index.searchsorted(end, side='right')
+
+    df = add_technical_indicators(bars.iloc[first:last].astype(np.float64))
+    return df[df.index >= start], level
 
 # ==============================================================================
 # 3. 策略引擎與分析函數
 # ==============================================================================
 
-def analyze_strategy(df):
+_RULE_OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+def load_strategy_rules(path):
+    """讀取 JSON 或 YAML 格式的策略規則檔。"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml  # 僅 YAML 規則檔需要
+            return yaml.safe_load(f)
+        return json.load(f)
+
+def _compile_operand(operand, thresholds, columns, known_columns=STRATEGY_COLUMNS):
+    """將運算元編譯為取值函數：參數與數字為常數，其餘字串須為已知欄位並記錄於 columns。"""
+    if isinstance(operand, str) and operand not in thresholds:
+        if operand not in known_columns:
+            raise ValueError(f"未知的欄位或參數: {operand}")
+        columns.add(operand)
+        return lambda arrays: arrays[operand]
+    value = float(thresholds[operand]) if isinstance(operand, str) else float(operand)
+    return lambda arrays: value
+
+def _compile_conditions(conditions, thresholds, columns, known_columns=STRATEGY_COLUMNS):
+    """將一組 AND 條件編譯為回傳布林陣列的函數。"""
+    compiled = []
+    for lhs, op, rhs in conditions:
+        if op not in _RULE_OPERATORS:
+            raise ValueError(f"不支援的運算子: {op}")
+        compiled.append((_compile_operand(lhs, thresholds, columns, known_columns), _RULE_OPERATORS[op],
+                         _compile_operand(rhs, thresholds, columns, known_columns)))
+
+    def evaluate(arrays, n):
+        mask = np.ones(n, dtype=bool)
+        for lhs, op, rhs in compiled:
+            mask &= op(lhs(arrays), rhs(arrays))
+        return mask
+
+    return evaluate
+
+def compile_strategy_rules(rules):
+    """
+    將宣告式策略規則編譯為向量化評分器 (僅需編譯一次)。
+    """
+    thresholds = rules.get("thresholds", {})
+    columns = set()
+    compiled_rules = []
+
+    for rule in rules["rules"]:
+        branches = rule.get("branches", [])
+        otherwise = rule.get("otherwise", {})
+        compiled_rules.append({
+            "name": rule["name"],
+            "conditions": [_compile_conditions(b["when"], thresholds, columns) for b in branches],
+            "weights": np.array([b.get("weight", 0) for b in branches] + [otherwise.get("weight", 0)], dtype=float),
+            "reasons": [b.get("reason", "").format(**thresholds) for b in branches] + [otherwise.get("reason", "").format(**thresholds)],
+        })
+
+    actions = rules.get("actions", [])
+    default_action = rules.get("default_action", {"label": "觀望 (Wait)", "color": "#ffc107"})
+    score_columns = set()  # actions 僅能引用 Score
+    action_conditions = [_compile_conditions(a["when"], thresholds, score_columns, {"Score"}) for a in actions]
+
+    return {
+        "name": rules.get("name", "未命名規則"),
+        "columns": sorted(columns),
+        "rules": compiled_rules,
+        "action_conditions": action_conditions,
+        "action_labels": [a["label"] for a in actions] + [default_action["label"]],
+        "action_colors": [a.get("color", ACCENT_COLOR) for a in actions] + [default_action.get("color", ACCENT_COLOR)],
+    }
+
+def _select_first(masks, n):
+    """回傳每列第一個為真的條件編號 (皆不成立則為條件數量)，語意等同 if/elif/else。"""
+    if not masks:
+        return np.zeros(n, dtype=int)
+    return np.select(masks, np.arange(len(masks)), default=len(masks))
+
+def evaluate_strategy_rules(strategy, df):
+    """
+    以向量化方式一次評分所有 K 線；df 可為多個標的串接 (例如以 Symbol 為外層索引) 的數據。
+    回傳與 df 同索引的 DataFrame：各規則命中的分支編號、Score 與 Action 編號。
+    """
+    n = len(df)
+    arrays = {c: df[c].to_numpy(dtype=float) for c in strategy["columns"]}
+
+    result = {}
+    score = np.zeros(n)
+    for rule in strategy["rules"]:
+        branch = _select_first([cond(arrays, n) for cond in rule["conditions"]], n)
+        score = score + rule["weights"][branch]
+        result[rule["name"]] = branch
+
+    result["Score"] = score
+    result["Action"] = _select_first([cond({"Score": score}, n) for cond in strategy["action_conditions"]], n)
+    return pd.DataFrame(result, index=df.index)
+
+def strategy_row_summary(strategy, row):
+    """將單列評分結果轉為策略總結所需的 Score / Reasons / 行動建議。"""
+    action = int(row["Action"])
+    return {
+        "Strategy_Summary": strategy["action_labels"][action],
+        "Strategy_Color": strategy["action_colors"][action],
+        "Score": float(row["Score"]),
+        "Reasons": [rule["reasons"][int(row[rule["name"]])] for rule in strategy["rules"]],
+    }
+
+def score_watchlist(frames, strategy):
+    """
+    對整個觀察清單 ({symbol: analysis_df}) 串接後一次評分，回傳每個標的最新一根 K 線的策略總結。
+    """
+    combined = pd.concat(frames, names=["Symbol"])
+    scored = evaluate_strategy_rules(strategy, combined)
+    latest = scored.groupby(level="Symbol", sort=False).tail(1)
+    return {symbol: strategy_row_summary(strategy, row) for (symbol, *_), row in latest.iterrows()}
+
+@st.cache_resource
+def get_compiled_strategy(path=None, mtime=None):
+    """
+    取得編譯後的策略 (每個規則檔於伺服器程序內僅編譯一次；mtime 變動時重新編譯)。
+    path 為 None 時使用內建預設規則。
+    """
+    rules = DEFAULT_STRATEGY_RULES if path is None else load_strategy_rules(path)
+    return compile_strategy_rules(rules)
+
+def list_strategy_rule_files():
+    """列出 strategy_rules/ 目錄下可供 A/B 測試的規則檔。"""
+    if not os.path.isdir(STRATEGY_RULES_DIR):
+        return []
+    return sorted(f for f in os.listdir(STRATEGY_RULES_DIR) if f.endswith((".json", ".yaml", ".yml")))
+
+def analyze_strategy(df, strategy=None):
     """
     專家AI：多週期趨勢確認策略 (Multitimeframe Trend Confirmation)
+    評分由宣告式策略規則決定，未指定時使用內建預設規則。
     """
     if df.empty:
         return None
 
+    # 以編譯後的策略規則評分最後一根 K 線
+    if strategy is None:
+        strategy = get_compiled_strategy()
+    scored = evaluate_strategy_rules(strategy, df.iloc[-1:])
+    rule_summary = strategy_row_summary(strategy, scored.iloc[-1])
+
+    # --- 策略總結 ---
+    summary = {
+        "Strategy_Summary": rule_summary['Strategy_Summary'],
+        "Strategy_Color": rule_summary['Strategy_Color'],
+        "Score": rule_summary['Score'],
+        "Reasons": rule_summary['Reasons'],
+    }
+    summary.update(market_snapshot(df))
+
+    return summary
+
+def market_snapshot(df):
+    """
+    最新一根 K 線的行情摘要：趨勢強度、現價、漲跌幅與成交量 (與策略規則無關)。
+    """
     # 取最後一筆數據
     last = df.iloc[-1]
-    
-    # 初始化分數 (Buy: 1, Sell: -1, Neutral: 0)
-    score = 0
-    reasons = []
-
-    # --- 1. MACD 趨勢判斷 ---
-    if last['MACD_Hist'] > 0 and last['MACD'] > last['MACD_Signal']:
-        score += 1
-        reasons.append("MACD: 多頭訊號 (柱狀圖翻紅，MACD 線上穿 Signal 線)。")
-    elif last['MACD_Hist'] < 0 and last['MACD'] < last['MACD_Signal']:
-        score -= 1
-        reasons.append("MACD: 空頭訊號 (柱狀圖翻綠，MACD 線下穿 Signal 線)。")
-    else:
-        reasons.append("MACD: 盤整或不明確。")
-
-    # --- 2. RSI 動量判斷 ---
-    if last['RSI'] <= RSI_OVERSOLD:
-        score += 1
-        reasons.append(f"RSI: 超賣區間 ({RSI_OVERSOLD} 以下)，存在反彈潛力。")
-    elif last['RSI'] >= RSI_OVERBOUGHT:
-        score -= 1
-        reasons.append(f"RSI: 超買區間 ({RSI_OVERBOUGHT} 以上)，存在回調風險。")
-    else:
-        reasons.append(f"RSI: 處於中性區間 ({RSI_OVERSOLD}-{RSI_OVERBOUGHT})。")
-        
-    # --- 3. ADX 趨勢強度判斷 ---
-    if last['ADX_9'] > 25:
-        reasons.append("ADX: 趨勢強勁，當前趨勢可靠度高。")
-    else:
-        reasons.append("ADX: 趨勢微弱，價格可能處於盤整。")
-
-    # --- 4. CMF 資金流向判斷 ---
-    if last['CMF'] > 0:
-        score += 0.5  # 資金流入視為弱多頭
-        reasons.append("CMF: 資金持續流入 (數值 > 0)。")
-    elif last['CMF'] < 0:
-        score -= 0.5  # 資金流出視為弱空頭
-        reasons.append("CMF: 資金持續流出 (數值 < 0)。")
-    else:
-        reasons.append("CMF: 資金流向不明顯。")
-        
-    # --- 5. Stochastic K/D 判斷 ---
-    if last['Stoch_%K'] < STOCH_OVERSOLD and last['Stoch_%K'] > last['Stoch_%D']:
-        score += 1
-        reasons.append(f"Stoch: 接近超賣區並形成金叉，多頭動能啟動。")
-    elif last['Stoch_%K'] > STOCH_OVERBOUGHT and last['Stoch_%K'] < last['Stoch_%D']:
-        score -= 1
-        reasons.append(f"Stoch: 接近超買區並形成死叉，空頭動能啟動。")
-    else:
-        reasons.append("Stoch: 中性或盤整信號。")
-        
-    # --- 最終行動建議 ---
-    if score >= 2:
-        action = "買入 (Buy)"
-        color = "#28a745" # 綠色
-    elif score <= -2:
-        action = "賣出 (Sell)"
-        color = "#dc3545" # 紅色
-    else:
-        action = "觀望 (Wait)"
-        color = "#ffc107" # 黃色
 
     # --- 趨勢強度 (線性回歸斜率) ---
     try:
@@ -321,21 +882,14 @@ def analyze_strategy(df):
             trend_strength = "區間震盪"
     except Exception:
         trend_strength = "無法計算"
-        
-    # --- 策略總結 ---
-    summary = {
-        "Strategy_Summary": action,
-        "Strategy_Color": color,
-        "Score": score,
-        "Reasons": reasons,
+
+    return {
         "Trend_Strength": trend_strength,
         "Current_Price": last['Close'],
         "Price_Change": (last['Close'] - df.iloc[-2]['Close']) / df.iloc[-2]['Close'] * 100 if len(df) >= 2 else 0,
         "Volume": last['Volume']
     }
 
-    return summary
-
 def calculate_fibonacci_levels(df, is_uptrend):
     """
     斐波那契回測分析：動態計算止盈/止損水平。
@@ -556,11 +1110,8 @@ def render_technical_analysis_panel(df):
     st.dataframe(styled_df, use_container_width=True, height=450)
 
 
-def render_expert_chart_pro(df, symbol):
-    """渲染 K 線與技術指標的專家級圖表"""
-    
-    # --- 專家圖表 Pro 標題 (使用新的 Header 樣式) ---
-    st.markdown("<div class='card-section-header'>📊 專家圖表 PRO - K線與戰術信號</div>", unsafe_allow_html=True)
+def build_expert_chart_figure(df, symbol, vp_levels=None):
+    """建立 K 線與技術指標的專家級圖表 (vp_levels 為成交量分佈的 POC / 價值區價位)"""
 
     # 建立四個子圖表：價格, MACD, 趨勢(ADX/CMF), 動量(Stochastics)
     fig = make_subplots(
@@ -578,17 +1129,27 @@ def render_expert_chart_pro(df, symbol):
                                  close=df['Close'],
                                  name='價格/Price'), row=1, col=1)
     
-    # RSI 曲線圖 (疊加在價格圖上，但使用不同 Y 軸)
+    # RSI 曲線圖 (疊加在價格圖上，但使用不同 Y 軸；y2-y4 已由子圖使用，故使用 y5)
     fig.add_trace(go.Scatter(x=df.index, y=df['RSI'], name='RSI', 
                              line=dict(color='yellow', width=1.5), 
-                             yaxis='y2'), row=1, col=1)
+                             xaxis='x', yaxis='y5'))
     
     # RSI 超買/超賣水平線
-    fig.add_hrect(y0=RSI_OVERBOUGHT, y1=100, line_width=0, fillcolor="red", opacity=0.1, row=1, col=1, yaxis='y2')
-    fig.add_hrect(y0=0, y1=RSI_OVERSOLD, line_width=0, fillcolor="green", opacity=0.1, row=1, col=1, yaxis='y2')
-    fig.add_hline(y=RSI_OVERBOUGHT, line_width=1, line_dash="dash", line_color="#dc3545", row=1, col=1, yaxis='y2')
-    fig.add_hline(y=RSI_OVERSOLD, line_width=1, line_dash="dash", line_color="#28a745", row=1, col=1, yaxis='y2')
+    fig.add_hrect(y0=RSI_OVERBOUGHT, y1=100, line_width=0, fillcolor="red", opacity=0.1, yref='y5')
+    fig.add_hrect(y0=0, y1=RSI_OVERSOLD, line_width=0, fillcolor="green", opacity=0.1, yref='y5')
+    fig.add_hline(y=RSI_OVERBOUGHT, line_width=1, line_dash="dash", line_color="#dc3545", yref='y5')
+    fig.add_hline(y=RSI_OVERSOLD, line_width=1, line_dash="dash", line_color="#28a745", yref='y5')
     
+    # 成交量分佈：價值區 (VAL-VAH) 與 POC 水平線
+    if vp_levels:
+        fig.add_hrect(y0=vp_levels['VAL'], y1=vp_levels['VAH'], line_width=0, fillcolor=ACCENT_COLOR, opacity=0.08, row=1, col=1)
+        fig.add_hline(y=vp_levels['POC'], line_width=1.5, line_color=ACCENT_COLOR, row=1, col=1,
+                      annotation_text="POC", annotation_position="top left")
+        fig.add_hline(y=vp_levels['VAH'], line_width=1, line_dash="dot", line_color=ACCENT_COLOR, row=1, col=1,
+                      annotation_text="VAH", annotation_position="top left")
+        fig.add_hline(y=vp_levels['VAL'], line_width=1, line_dash="dot", line_color=ACCENT_COLOR, row=1, col=1,
+                      annotation_text="VAL", annotation_position="bottom left")
+
     # --- 2. MACD 圖 ---
     fig.add_trace(go.Bar(x=df.index, y=df['MACD_Hist'], name='MACD 柱', 
                          marker_color=np.where(df['MACD_Hist'] > 0, '#28a745', '#dc3545')), row=2, col=1)
@@ -621,9 +1182,9 @@ def render_expert_chart_pro(df, symbol):
         hovermode="x unified",
     )
     
-    # 設置 RSI 的獨立 Y 軸 (y2)
+    # 設置 RSI 的獨立 Y 軸 (y5，疊加於價格圖)
     fig.update_layout(
-        yaxis2=dict(
+        yaxis5=dict(
             title="RSI",
             overlaying='y',
             side='right',
@@ -638,10 +1199,18 @@ def render_expert_chart_pro(df, symbol):
     fig.update_yaxes(title_text="ADX/CMF", row=3, col=1)
     fig.update_yaxes(title_text="Stoch", row=4, col=1)
 
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+def render_expert_chart_pro(df, symbol, vp_levels=None):
+    """渲染 K 線與技術指標的專家級圖表"""
+    
+    # --- 專家圖表 Pro 標題 (使用新的 Header 樣式) ---
+    st.markdown("<div class='card-section-header'>📊 專家圖表 PRO - K線與戰術信號</div>", unsafe_allow_html=True)
+
+    st.plotly_chart(build_expert_chart_figure(df, symbol, vp_levels), use_container_width=True)
 
-def render_fib_risk_panel(fib_info, summary):
-    """渲染斐波那契回測與風險管理面板"""
+def render_fib_risk_panel(fib_info, summary, vp_levels=None):
+    """渲染斐波那契回測、成交量分佈與風險管理面板"""
     
     # --- 風險管理標題 (使用新的 Header 樣式) ---
     st.markdown("<div class='card-section-header'>🛡️ 斐波那契回測與風險評估</div>", unsafe_allow_html=True)
@@ -686,6 +1255,17 @@ def render_fib_risk_panel(fib_info, summary):
             f"TWD {low:,.2f}"
         ), unsafe_allow_html=True)
         
+    # --- 成交量分佈 (Volume Profile) ---
+    if vp_levels:
+        st.markdown(f"##### 📦 成交量分佈 (最近 {VP_WINDOW} 根 K 線)")
+        cols_vp = st.columns(3)
+        with cols_vp[0]:
+            st.markdown(create_card_html("🎯 POC 成交密集價", f"TWD {vp_levels['POC']:,.2f}"), unsafe_allow_html=True)
+        with cols_vp[1]:
+            st.markdown(create_card_html(f"⬆️ 價值區上緣 VAH ({VP_VALUE_AREA:.0%})", f"TWD {vp_levels['VAH']:,.2f}"), unsafe_allow_html=True)
+        with cols_vp[2]:
+            st.markdown(create_card_html(f"⬇️ 價值區下緣 VAL ({VP_VALUE_AREA:.0%})", f"TWD {vp_levels['VAL']:,.2f}"), unsafe_allow_html=True)
+
     # --- 風險警示與建議 ---
     st.markdown("---")
     
@@ -695,7 +1275,324 @@ def render_fib_risk_panel(fib_info, summary):
         st.info(f"✅ **戰術安全**：當前價格與 {level_type} 尚有安全距離。")
 
 # ==============================================================================
-# 5. 主應用程式邏輯
+# 5. 數據匯出 (Arrow IPC / Parquet)
+# ==============================================================================
+
+def export_watchlist(symbols, timeframe, fmt="parquet", strategy=None, profiles=None):
+    """
+    批次匯出整個觀察清單：每個標的的指標數據 (analysis_df) 各自一檔，
+    掃描結果 (策略總結) 以指定的策略規則集一次評分後彙整為一張表。
+    profiles 為上次匯出 (同一週期) 的成交量分佈 ({symbol: profile})，傳入時就地增量更新，
+    下次匯出每個標的僅需處理新增 K 線。
+    """
+    period, interval = PERIOD_MAP[timeframe]
+    if strategy is None:
+        strategy = get_compiled_strategy()
+    rows = []
+    frames = {}
+    frame_paths = {}
+
+    for symbol in symbols:
+        df, status_message = fetch_data(symbol, period, interval)
+        if not status_message.startswith("✅") or df.empty:
+            rows.append({"Symbol": symbol, "Timeframe": timeframe, "Interval": interval, "Status": status_message})
+            continue
+        frames[symbol] = (df, status_message)
+        frame_paths[symbol] = write_arrow_table(frame_to_arrow(df), export_path(symbol, interval, fmt), fmt)
+
+    # 整個觀察清單串接後一次評分 (僅需各標的的策略欄位)
+    summaries = score_watchlist({symbol: df[strategy['columns']] for symbol, (df, _) in frames.items()}, strategy) if frames else {}
+    vp_levels_by_symbol, profiles = scan_volume_profiles({symbol: df for symbol, (df, _) in frames.items()}, profiles)
+
+    for symbol, (df, status_message) in frames.items():
+        summary = summaries[symbol]
+        snapshot = market_snapshot(df)
+        vp_levels = vp_levels_by_symbol.get(symbol, {})
+        # 各市場時區不同，統一以 UTC 記錄最後一根 K 線時間
+        bar_time = pd.Timestamp(df.index[-1])
+        bar_time = bar_time.tz_convert("UTC") if bar_time.tzinfo is not None else bar_time.tz_localize("UTC")
+        rows.append({
+            "Symbol": symbol,
+            "Timeframe": timeframe,
+            "Interval": interval,
+            "Status": status_message,
+            "Bar_Time": bar_time,
+            "Strategy_Name": strategy['name'],
+            "Strategy_Summary": summary['Strategy_Summary'],
+            "Score": float(summary['Score']),
+            "Reasons": summary['Reasons'],
+            "Trend_Strength": snapshot['Trend_Strength'],
+            "Current_Price": float(snapshot['Current_Price']),
+            "Price_Change": float(snapshot['Price_Change']),
+            "Volume": float(snapshot['Volume']),
+            "VP_POC": float(vp_levels.get('POC', np.nan)),
+            "VP_VAH": float(vp_levels.get('VAH', np.nan)),
+            "VP_VAL": float(vp_levels.get('VAL', np.nan)),
+        })
+
+    scan_table = pa.Table.from_pandas(pd.DataFrame(rows), preserve_index=False)
+    scan_path = write_arrow_table(scan_table, export_path("scan", interval, fmt, kind="scans"), fmt)
+
+    return {"Frames": frame_paths, "Scan": scan_path, "Profiles": profiles, "Exported_At": datetime.now()}
+
+def _export_schedules():
+    """
+    目前執行中的定時匯出排程 ({參數: 排程})，直接由存活的執行緒取得：
+    即使 cache_resource 被清除 (例如「Clear cache」)，既有排程仍可被找到並停止。
+    """
+    schedules = {}
+    for thread in threading.enumerate():
+        schedule = getattr(thread, 'octs_export_schedule', None)
+        if schedule is not None and not schedule['stop'].is_set():
+            schedules[schedule['args']] = schedule
+    return schedules
+
+@st.cache_resource
+def _export_schedule_lock():
+    """登記/取消排程時使用的程序內鎖。"""
+    return threading.Lock()
+
+def _prune_export_sessions(schedule):
+    """移除已關閉 (不再存在於 Streamlit Runtime) 的 session；沒有使用者時停止排程。"""
+    if runtime.exists():
+        schedule['sessions'] = {sid for sid in schedule['sessions'] if runtime.get_instance().is_active_session(sid)}
+    if not schedule['sessions']:
+        schedule['stop'].set()
+
+def start_export_scheduler(symbols, timeframe, fmt, interval_minutes, strategy_key=()):
+    """
+    啟動背景定時匯出執行緒。strategy_key 為 get_compiled_strategy 的參數 ((規則檔路徑, mtime)，空值為內建預設)。
+    回傳排程 (參數、stop Event、使用中的 session)；每輪匯出前先移除已關閉的 session，皆已關閉時自行停止。
+    """
+    args = (symbols, timeframe, fmt, interval_minutes, strategy_key)
+    schedule = {'args': args, 'stop': threading.Event(), 'sessions': set()}
+    profiles = {}  # 成交量分佈於各輪匯出間保留，每輪僅處理新增 K 線
+
+    def _run():
+        while not schedule['stop'].is_set():
+            with _export_schedule_lock():
+                _prune_export_sessions(schedule)
+            if schedule['stop'].is_set():
+                break
+            try:
+                export_watchlist(list(symbols), timeframe, fmt, get_compiled_strategy(*strategy_key), profiles)
+            except Exception:
+                pass  # 單次匯出失敗不中斷排程，下一輪再試
+            schedule['stop'].wait(interval_minutes * 60)
+
+    thread = threading.Thread(target=_run, name="octs-export-scheduler", daemon=True)
+    thread.octs_export_schedule = schedule
+    return schedule, thread
+
+def acquire_export_schedule(session_id, scheduler_args):
+    """登記 session 使用此排程；同一組參數於伺服器程序內僅一個排程 (重複登記無副作用)。"""
+    with _export_schedule_lock():
+        schedule = _export_schedules().get(scheduler_args)
+        thread = None
+        if schedule is None:
+            schedule, thread = start_export_scheduler(*scheduler_args)
+        schedule['sessions'].add(session_id)
+        if thread is not None:
+            thread.start()
+
+def release_export_schedule(session_id, scheduler_args):
+    """取消 session 的登記；沒有任何 session 使用時停止排程。"""
+    with _export_schedule_lock():
+        schedule = _export_schedules().get(scheduler_args)
+        if schedule is not None:
+            schedule['sessions'].discard(session_id)
+            if not schedule['sessions']:
+                schedule['stop'].set()
+
+# ==============================================================================
+# 6. 即時 K 線串流 (Live Mode)
+# ==============================================================================
+
+def _parse_bar_message(message):
+    """
+    解析單則 K 線訊息 (單根 K 線或 K 線陣列的 JSON)；格式錯誤或缺少欄位時回傳 [None]，
+    由 poll_bar_feed 略過並計數，不影響同批的其他訊息。
+    """
+    try:
+        record = json.loads(message)
+    except ValueError:
+        return [None]
+    records = record if isinstance(record, list) else [record]
+    required = ['Datetime'] + PYRAMID_COLUMNS
+    return [r if isinstance(r, dict) and all(k in r for k in required) else None for r in records]
+
+def _tail_bar_file(path, cursor):
+    """
+    讀取 JSON Lines 檔案自 cursor (位元組位置) 之後新增的完整行，作為本機 K 線來源。
+    每行各自解析，格式錯誤的行以 None 表示，cursor 一律前進至最後一個完整行之後。
+    檔案被截斷 (長度小於 cursor) 時自頭重讀。
+    """
+    if not os.path.exists(path):
+        return [], cursor
+    if os.path.getsize(path) < cursor:
+        cursor = 0
+    with open(path, 'rb') as f:
+        f.seek(cursor)
+        chunk = f.read()
+    end = chunk.rfind(b'\n')
+    if end < 0:
+        return [], cursor  # 尚未寫完的行留待下次讀取
+    records = [r for line in chunk[:end].splitlines() if line.strip() for r in _parse_bar_message(line)]
+    return records, cursor + end + 1
+
+@st.cache_resource
+def get_websocket_feed(url):
+    """
+    於背景執行緒訂閱 websocket K 線來源 (每個 URL 於伺服器程序內僅一條連線，斷線自動重連)。
+    訊息為單根 K 線或 K 線陣列的 JSON，格式錯誤的訊息以 None 存入緩衝區 (不中斷連線)；
+    緩衝區以 LIVE_FEED_BUFFER 為上限，cursor 為累計序號。
+    """
+    from websockets.sync.client import connect  # 僅 websocket 來源需要
+
+    feed = {'messages': [], 'dropped': 0, 'error': None, 'lock': threading.Lock()}
+
+    def _run():
+        while True:
+            try:
+                with connect(url) as ws:
+                    feed['error'] = None
+                    for message in ws:
+                        records = _parse_bar_message(message)
+                        with feed['lock']:
+                            feed['messages'].extend(records)
+                            overflow = len(feed['messages']) - LIVE_FEED_BUFFER
+                            if overflow > 0:
+                                del feed['messages'][:overflow]
+                                feed['dropped'] += overflow
+            except Exception as e:
+                feed['error'] = str(e)
+                time.sleep(LIVE_REFRESH_SECONDS)
+
+    threading.Thread(target=_run, name=f"octs-live-feed-{url}", daemon=True).start()
+    return feed
+
+def poll_bar_feed(source, cursor):
+    """
+    非阻塞地取出 cursor 之後的新 K 線。source 為 ws:// / wss:// URL 或 JSON Lines 檔案路徑。
+    回傳 (bars, cursor, skipped)；bars 以 UTC 時間為索引，欄位為 OHLCV，
+    skipped 為本次略過的格式錯誤訊息數 (JSON 錯誤、缺少欄位、時間或數值無法解析)。
+    """
+    if source.startswith(("ws://", "wss://")):
+        feed = get_websocket_feed(source)
+        with feed['lock']:
+            records = feed['messages'][max(cursor - feed['dropped'], 0):]
+            cursor = feed['dropped'] + len(feed['messages'])
+    else:
+        records, cursor = _tail_bar_file(source, cursor)
+
+    valid = [r for r in records if r is not None]
+    if not valid:
+        return pd.DataFrame(columns=PYRAMID_COLUMNS), cursor, len(records)
+    bars = pd.DataFrame.from_records(valid)
+    index = pd.to_datetime(bars.pop('Datetime'), utc=True, errors='coerce')
+    bars = bars[PYRAMID_COLUMNS].apply(pd.to_numeric, errors='coerce').astype(np.float64)
+    bars.index = pd.DatetimeIndex(index)
+    bars = bars[bars.index.notna() & bars.notna().all(axis=1).to_numpy()]
+    return bars, cursor, len(records) - len(bars)
+
+def merge_live_bars(tail, bars, symbol, interval):
+    """
+    將新 K 線併入尾段數據：新 K 線先經 normalize_ohlcv 驗證 (與歷史數據相同的時區、交易時段與價格檢查)，
+    同時間者覆蓋最後一根 (盤中更新)，較新者附加，較舊者忽略。
+    只保留最後 LIVE_WARMUP_BARS 根並重算指標，每筆更新的成本與歷史長度無關。
+    回傳 (tail, 是否變動, 未通過驗證而剔除的 K 線數)。
+    """
+    # 同一時間戳的多次盤中更新是正常的：先保留最後一筆再驗證，不計為剔除
+    bars, checks = normalize_ohlcv(bars[~bars.index.duplicated(keep='last')], symbol, interval)
+    rejected = checks['rows_in'] - checks['rows_out']
+    if bars.empty:
+        return tail, False, rejected
+    bars.index = bars.index.tz_convert(tail.index.tz) if tail.index.tz is not None else bars.index.tz_convert(None)
+    bars = bars[bars.index >= tail.index[-1]]
+    if bars.empty:
+        return tail, False, rejected
+
+    ohlcv = pd.concat([tail[PYRAMID_COLUMNS], bars])
+    ohlcv = ohlcv[~ohlcv.index.duplicated(keep='last')].sort_index().iloc[-LIVE_WARMUP_BARS:]
+    return add_technical_indicators(ohlcv.astype(np.float64)), True, rejected
+
+def update_live_figure(fig, window_df):
+    """
+    以固定長度的視窗數據就地更新各 trace 的數值；子圖、水平線與版面配置沿用既有圖表，不重建。
+    """
+    x = window_df.index
+    with fig.batch_update():
+        for trace in fig.data:
+            if trace.name == '價格/Price':
+                trace.update(x=x, open=window_df['Open'], high=window_df['High'], low=window_df['Low'], close=window_df['Close'])
+            elif trace.name in LIVE_TRACE_COLUMNS:
+                values = window_df[LIVE_TRACE_COLUMNS[trace.name]]
+                trace.update(x=x, y=values)
+                if trace.type == 'bar':
+                    trace.marker.color = np.where(values > 0, '#28a745', '#dc3545')
+    return fig
+
+def _live_state(symbol, interval, source, df, strategy=None):
+    """取得 (或初始化) 即時模式狀態：尾段數據、feed 游標、圖表與節流摘要。"""
+    key = (symbol, interval, source)
+    state = st.session_state.get('live_state')
+    if state is None or state['key'] != key:
+        tail = df.iloc[-LIVE_WARMUP_BARS:].copy()
+        state = {
+            'key': key,
+            'tail': tail,
+            'cursor': 0,
+            'fig': build_expert_chart_figure(tail.iloc[-LIVE_WINDOW_BARS:], symbol),
+            'summary': analyze_strategy(tail, strategy),
+            'summary_at': time.time(),
+            'ticks': 0,
+            'skipped': 0,
+        }
+        st.session_state['live_state'] = state
+    return state
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def render_live_panel(symbol, interval, source, df, strategy=None):
+    """
+    即時監控片段：僅此片段定時重跑 (不觸發整頁 rerun、不重新下載)。
+    每次輪詢只處理新 K 線並更新固定視窗的圖表；摘要卡片以 LIVE_SUMMARY_THROTTLE_SECONDS 節流更新。
+    """
+    st.markdown("<div class='card-section-header'>📡 即時戰術監控</div>", unsafe_allow_html=True)
+
+    state = _live_state(symbol, interval, source, df, strategy)
+    try:
+        bars, state['cursor'], skipped = poll_bar_feed(source, state['cursor'])
+        state['skipped'] += skipped
+    except Exception as e:
+        st.warning(f"⚠️ 即時數據來源異常: {e}")
+        bars = pd.DataFrame(columns=PYRAMID_COLUMNS)
+
+    changed = False
+    if not bars.empty:
+        state['tail'], changed, rejected = merge_live_bars(state['tail'], bars, symbol, interval)
+        state['skipped'] += rejected
+    if changed:
+        state['ticks'] += 1
+        update_live_figure(state['fig'], state['tail'].iloc[-LIVE_WINDOW_BARS:])
+        if time.time() - state['summary_at'] >= LIVE_SUMMARY_THROTTLE_SECONDS:
+            state['summary'] = analyze_strategy(state['tail'], strategy)
+            state['summary_at'] = time.time()
+
+    summary = state['summary']
+    cols_live = st.columns(3)
+    with cols_live[0]:
+        st.markdown(create_card_html("💰 即時價格", f"TWD {summary['Current_Price']:,.2f}"), unsafe_allow_html=True)
+    with cols_live[1]:
+        st.markdown(create_card_html("🚀 單根變動", f"{summary['Price_Change']:+.2f}%"), unsafe_allow_html=True)
+    with cols_live[2]:
+        st.markdown(create_card_html("🛰️ 專家行動建議", f"{summary['Strategy_Summary']} ({summary['Score']:.1f})"), unsafe_allow_html=True)
+
+    st.caption(f"最後 K 線：{state['tail'].index[-1]} · 已處理 {state['ticks']} 次更新 · 摘要每 {LIVE_SUMMARY_THROTTLE_SECONDS} 秒更新"
+               + (f" · 已略過 {state['skipped']} 筆格式錯誤或未通過驗證的 K 線" if state['skipped'] else ""))
+    st.plotly_chart(state['fig'], use_container_width=True, key="live_chart")
+
+# ==============================================================================
+# 7. 主應用程式邏輯
 # ==============================================================================
 
 # 應用標題
@@ -746,11 +1643,68 @@ selected_timeframe = st.sidebar.radio(
     index=2 # 預設為 1 日
 )
 
-# 4. 執行按鈕 (不變)
+# 圖表視窗 (縮放)：由 OHLCV 金字塔挑選最粗的合適層級，數據量不隨檢視長度增加
+selected_chart_window = st.sidebar.selectbox("圖表視窗", list(CHART_WINDOWS.keys()), index=0)
+
+# 4. 策略規則集 (A/B 測試：strategy_rules/ 目錄下的 JSON/YAML 規則檔)
+strategy_options = ["內建預設"] + list_strategy_rule_files()
+selected_rule_set = st.sidebar.selectbox("策略規則集", strategy_options, index=0)
+active_strategy_key = ()  # get_compiled_strategy 的參數，供背景排程重新取得相同規則
+active_strategy = get_compiled_strategy()
+if selected_rule_set != "內建預設":
+    rule_path = os.path.join(STRATEGY_RULES_DIR, selected_rule_set)
+    try:
+        active_strategy = get_compiled_strategy(rule_path, os.path.getmtime(rule_path))
+        active_strategy_key = (rule_path, os.path.getmtime(rule_path))
+    except Exception as e:
+        # 規則檔格式錯誤時不中斷頁面，改用內建預設規則
+        st.sidebar.error(f"❌ 規則檔 {selected_rule_set} 載入失敗，改用內建預設：{e}")
+
+# 5. 執行按鈕 (不變)
 if st.sidebar.button("📊 執行AI戰術掃描", use_container_width=True):
     st.session_state['data_ready'] = False
     st.session_state['last_search_symbol'] = final_symbol
 
+# 6. 數據匯出 (Arrow / Parquet)
+with st.sidebar.expander("💾 數據匯出 (Arrow / Parquet)"):
+    export_symbols = st.multiselect("匯出觀察清單", list(FULL_SYMBOLS_MAP.keys()), default=list(FULL_SYMBOLS_MAP.keys()))
+    export_format = EXPORT_FORMATS[st.radio("匯出格式", list(EXPORT_FORMATS.keys()), horizontal=True)]
+
+    if st.button("💾 立即匯出", use_container_width=True) and export_symbols:
+        with st.spinner(f"正在匯出 {len(export_symbols)} 檔標的 ({selected_timeframe})..."):
+            export_profiles = st.session_state.setdefault('export_volume_profiles', {}).setdefault(selected_timeframe, {})
+            export_result = export_watchlist(export_symbols, selected_timeframe, export_format, active_strategy, export_profiles)
+        st.success(f"✅ 已匯出 {len(export_result['Frames'])} 檔指標數據與掃描結果至 {EXPORT_DIR}/")
+
+    schedule_enabled = st.checkbox("定時匯出", value=False)
+    schedule_minutes = st.number_input("匯出間隔 (分鐘)", min_value=5, max_value=24*60, value=60, step=5)
+    scheduler_args = (tuple(export_symbols), selected_timeframe, export_format, int(schedule_minutes), active_strategy_key)
+
+    # 同一組排程可能由多個 session 共用：僅在最後一個使用者停用時才真正停止
+    session_id = get_script_run_ctx().session_id
+    previous_args = st.session_state.get('export_scheduler_args')
+    if previous_args and (not schedule_enabled or previous_args != scheduler_args):
+        release_export_schedule(session_id, previous_args)
+        st.session_state['export_scheduler_args'] = None
+    if schedule_enabled and export_symbols:
+        acquire_export_schedule(session_id, scheduler_args)
+        st.session_state['export_scheduler_args'] = scheduler_args
+        st.caption(f"⏱️ 定時匯出中：每 {int(schedule_minutes)} 分鐘寫入 {EXPORT_DIR}/")
+
+# 7. 即時模式
+live_mode = st.sidebar.checkbox("📡 即時模式", value=False, disabled=selected_timeframe not in LIVE_TIMEFRAMES,
+                                help=f"僅支援 {', '.join(LIVE_TIMEFRAMES)} 週期")
+live_source = st.sidebar.text_input("即時數據來源 (ws:// URL 或 JSON Lines 檔案)", value=LIVE_DEFAULT_SOURCE) if live_mode else None
+
+# 8. 跨程序共享快取狀態
+with st.sidebar.expander("🗄️ 共享快取狀態"):
+    cache_stats, cache_usage = shared_cache_stats()
+    st.caption(f"{cache_usage['entries']} 筆 / {cache_usage['bytes'] / 1024**2:,.1f} MB (上限 {SHARED_CACHE_MAX_BYTES / 1024**2:,.0f} MB，TTL {CACHE_TTL_SECONDS // 3600} 小時)")
+    if not cache_stats.empty:
+        total_lookups = (cache_stats['hits'] + cache_stats['misses']).sum()
+        st.metric("跨程序命中率", f"{cache_stats['cross_hits'].sum() / total_lookups:.1%}" if total_lookups else "—")
+        st.dataframe(cache_stats, use_container_width=True, hide_index=True)
+
 # --- 應用程式主體 ---
 if 'last_search_symbol' not in st.session_state:
     st.session_state['last_search_symbol'] = final_symbol
@@ -770,20 +1724,36 @@ if st.session_state['last_search_symbol']:
             st.session_state['analysis_df'] = df
             
             # 策略分析
-            st.session_state['strategy_summary'] = analyze_strategy(df)
+            st.session_state['strategy_summary'] = analyze_strategy(df, active_strategy)
             
             # 斐波那契分析
             is_uptrend = st.session_state['strategy_summary']['Trend_Strength'] in ["強勁上漲", "區間震盪"]
             st.session_state['fib_info'] = calculate_fibonacci_levels(df, is_uptrend)
 
+            # 成交量分佈 (依標的與週期保留狀態，重新整理時僅處理新增 K 線)
+            profiles = st.session_state.setdefault('volume_profiles', {})
+            profile_key = (st.session_state['last_search_symbol'], interval)
+            profiles[profile_key] = update_volume_profile(profiles.get(profile_key), df)
+            st.session_state['vp_levels'] = volume_profile_levels(profiles[profile_key])
+
         st.info(status_message)
 
+        checks = df.attrs.get('validation') if not df.empty else None
+        if checks:
+            dropped = checks['rows_in'] - checks['rows_out']
+            with st.expander(f"🧪 數據品質檢查 (剔除 {dropped} 根 / 共 {checks['rows_in']} 根)"):
+                st.dataframe(
+                    pd.DataFrame({"檢查項目": [VALIDATION_CHECKS[k] for k in checks], "計數": list(checks.values())}),
+                    use_container_width=True, hide_index=True,
+                )
+
 
 if st.session_state.get('data_ready', False) and not st.session_state['analysis_df'].empty:
     
     df = st.session_state['analysis_df']
     summary = st.session_state['strategy_summary']
     fib_info = st.session_state['fib_info']
+    vp_levels = st.session_state.get('vp_levels')
 
     # 1. 頂部核心戰情總覽與行動建議
     if summary:
@@ -791,13 +1761,27 @@ if st.session_state.get('data_ready', False) and not st.session_state['analysis_
         
     st.markdown("---")
 
+    # 即時監控 (僅片段定時重跑，其餘區塊不重建)
+    if live_mode and selected_timeframe in LIVE_TIMEFRAMES:
+        render_live_panel(st.session_state['last_search_symbol'], interval, live_source, df, active_strategy)
+        st.markdown("---")
+
     # 2. 斐波那契回測與風險評估 (在圖表前顯示，作為先行指標)
-    render_fib_risk_panel(fib_info, summary)
+    render_fib_risk_panel(fib_info, summary, vp_levels)
     
     st.markdown("---")
     
-    # 3. K線與技術指標圖表
-    render_expert_chart_pro(df, st.session_state['last_search_symbol'])
+    # 3. K線與技術指標圖表 (選擇圖表視窗時改由 OHLCV 金字塔提供數據)
+    chart_df = df
+    chart_window_days = CHART_WINDOWS[selected_chart_window]
+    if chart_window_days:
+        chart_end = pd.Timestamp.now(tz='UTC')
+        chart_start = chart_end - pd.Timedelta(days=chart_window_days)
+        pyramid_df, pyramid_level = get_pyramid_frame(st.session_state['last_search_symbol'], chart_start, chart_end)
+        if not pyramid_df.empty:
+            chart_df = pyramid_df
+            st.caption(f"🔭 圖表視窗 {selected_chart_window}：使用 {pyramid_level} 層級 ({len(chart_df)} 根 K 線)")
+    render_expert_chart_pro(chart_df, st.session_state['last_search_symbol'], vp_levels)
     
     st.markdown("---")
     
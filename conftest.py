@@ -0,0 +1 @@
+# 讓 pytest 將專案根目錄加入 sys.path，tests/ 可直接 import octs_* 模組
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+O.C.T.S. 即時 K 線模擬來源 (Live Feed Stand-in)
+
+產生隨機漫步的 30 分 K 線，供 app3.0.py 的「📡 即時模式」在本機或測試中使用：
+每根 K 線先以數次盤中更新 (同一時間戳) 推送，再開始下一根。
+
+輸出方式：
+- JSON Lines 檔案 (預設)：app3.0.py 的即時數據來源填入檔案路徑
+      python livefeed.py --file live_bars.jsonl
+- 本機 websocket 伺服器：app3.0.py 的即時數據來源填入 ws://localhost:8765
+      python livefeed.py --serve 8765
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def generate_bars(start, price, bar_minutes=30, updates_per_bar=3, seed=0):
+    """無限產生 K 線訊息；同一根 K 線會以 updates_per_bar 次逐步更新後才收盤。"""
+    rng = np.random.default_rng(seed)
+    bar_time = pd.Timestamp(start).tz_localize("UTC") if pd.Timestamp(start).tzinfo is None else pd.Timestamp(start)
+    while True:
+        open_ = high = low = close = price
+        volume = 0.0
+        for _ in range(updates_per_bar):
+            close = close * (1 + rng.normal(0, 0.002))
+            high, low = max(high, close), min(low, close)
+            volume += float(rng.integers(100, 10_000))
+            yield {"Datetime": bar_time.isoformat(), "Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}
+        price = close
+        bar_time += pd.Timedelta(minutes=bar_minutes)
+
+
+def write_file(path, bars, interval):
+    with open(path, "a", encoding="utf-8") as f:
+        for bar in bars:
+            f.write(json.dumps(bar) + "\n")
+            f.flush()
+            time.sleep(interval)
+
+
+def serve_websocket(port, bars, interval):
+    from websockets.sync.server import serve
+
+    def handler(ws):
+        for bar in bars:
+            ws.send(json.dumps(bar))
+            time.sleep(interval)
+
+    with serve(handler, "localhost", port) as server:
+        print(f"📡 ws://localhost:{port}")
+        server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="O.C.T.S. 即時 K 線模擬來源")
+    parser.add_argument("--file", default="live_bars.jsonl", help="輸出的 JSON Lines 檔案")
+    parser.add_argument("--serve", type=int, default=None, help="改以 websocket 伺服器輸出 (埠號)")
+    parser.add_argument("--start", default=None, help="第一根 K 線時間 (預設為目前時間)")
+    parser.add_argument("--price", type=float, default=100.0, help="起始價格")
+    parser.add_argument("--interval", type=float, default=1.0, help="訊息間隔 (秒)")
+    args = parser.parse_args()
+
+    start = args.start or pd.Timestamp.now(tz="UTC").floor("30min")
+    bars = generate_bars(start, args.price)
+    if args.serve:
+        serve_websocket(args.serve, bars, args.interval)
+    else:
+        write_file(args.file, bars, args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+O.C.T.S. 併發壓力測試工具 (Load-Test Harness)
+
+以 Streamlit AppTest 模擬 N 個同時操作的使用者 session，對 app3.0.py 反覆執行
+「📊 執行AI戰術掃描」。數據來源替換為離線的假下載器 (不連網、結果可重現)，
+每個 session 依序輪替標的與 PERIOD_MAP 中的各個週期。
+
+報告項目 (依併發數逐級擴增)：
+- 端到端延遲 p50 / p99 (一次完整 script rerun，僅計成功的 rerun)
+- 失敗的 rerun 次數 (拋出例外或以「❌」狀態訊息結束者另行統計，不計入延遲與吞吐量)
+- 吞吐量 (每秒完成的掃描次數)
+- 快取命中率 (fetch 次數 vs. 實際呼叫下載器次數) 與共享快取的跨程序命中率
+- 每個工作程序的 RSS 記憶體 (目前值 / 峰值)
+
+使用方式：
+    python loadtest.py --sessions 1,4,16 --iterations 8 --processes 2
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import resource
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from octs_config import PERIOD_MAP
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app3.0.py")
+
+TIMEFRAMES = list(PERIOD_MAP)
+SYMBOLS = ["2330.TW", "2454.TW", "0050.TW", "NVDA", "AAPL", "BTC-USD", "ETH-USD"]
+
+# 假下載器：由 yfinance 的 period / interval 字串估算 K 線數量 (每年 252 個交易日)。
+# 假數據只落在工作日，盤中 K 線只落在台股與美股交易時段的交集 (當地時間 09:30–13:30)，
+# 使 app3.0.py 的交易時段檢查對所有標的都保留全部 K 線 (naive 時間視為交易所當地時間)。
+_TRADING_DAYS_PER_YEAR = 252
+_FAKE_SESSION = (9 * 60 + 30, 13 * 60 + 30)
+_SESSION_MINUTES = _FAKE_SESSION[1] - _FAKE_SESSION[0]
+_MAX_PERIOD_YEARS = 30
+_PERIOD_YEARS = {"d": 1 / 365, "wk": 7 / 365, "mo": 1 / 12, "y": 1}
+_INTERVAL_DAYS = {"m": 1 / _SESSION_MINUTES, "h": 60 / _SESSION_MINUTES, "d": 1, "wk": 5, "mo": 21}
+_INTERVAL_MINUTES = {"m": 1, "h": 60}
+_INTERVAL_FREQ = {"d": "B", "wk": "W-MON", "mo": "BMS"}
+
+
+def _split_unit(value):
+    """將 "60d"、"1wk" 之類的字串拆為 (數量, 單位)。"""
+    digits = value.rstrip("abcdefghijklmnopqrstuvwxyz")
+    return int(digits), value[len(digits):]
+
+
+def _fake_bar_count(period, interval):
+    years = _MAX_PERIOD_YEARS if period == "max" else _split_unit(period)[0] * _PERIOD_YEARS[_split_unit(period)[1]]
+    count, unit = _split_unit(interval)
+    return max(1, int(years * _TRADING_DAYS_PER_YEAR / (count * _INTERVAL_DAYS[unit])))
+
+
+def _fake_index(interval, n, end=pd.Timestamp("2026-10-16")):
+    """最後 n 根 K 線的時間：日線以上為工作日 / 週一 / 月初工作日，盤中 K 線僅在 _FAKE_SESSION 內。"""
+    count, unit = _split_unit(interval)
+    if unit not in _INTERVAL_MINUTES:
+        return pd.date_range(end=end, periods=n, freq=f"{count}{_INTERVAL_FREQ[unit]}")
+    offsets = pd.to_timedelta(np.arange(*_FAKE_SESSION, count * _INTERVAL_MINUTES[unit]), unit="min")
+    days = pd.bdate_range(end=end, periods=-(-n // len(offsets)))
+    return (days.repeat(len(offsets)) + np.tile(offsets, len(days)))[-n:]
+
+
+# 每個 PERIOD_MAP 週期的假數據 K 線數量
+_FAKE_BARS = {(period, interval): _fake_bar_count(period, interval) for period, interval in PERIOD_MAP.values()}
+
+
+# ==============================================================================
+# 1. 離線假下載器
+# ==============================================================================
+
+_download_lock = threading.Lock()
+_download_calls = 0
+
+
+def fake_download(tickers, period="1y", interval="1d", progress=False, latency=0.0, **kwargs):
+    """
+    產生可重現的隨機漫步 OHLCV 數據，介面與 yfinance.download 相容。
+    latency 模擬網路延遲 (秒)。
+    """
+    global _download_calls
+    with _download_lock:
+        _download_calls += 1
+    if latency:
+        time.sleep(latency)
+
+    n = _FAKE_BARS.get((period, interval), 500)
+    rng = np.random.default_rng(zlib.crc32(f"{tickers}|{period}|{interval}".encode()))
+    index = _fake_index(interval, n)
+
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = close * (1 + rng.normal(0, 0.003, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.004, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.004, n)))
+    volume = rng.integers(1_000, 1_000_000, n).astype(float)
+
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Adj Close": close, "Volume": volume},
+        index=pd.DatetimeIndex(index, name="Date"),
+    )
+
+
+def install_fake_downloader(latency):
+    """以假下載器取代 yfinance.download (app3.0.py 透過 yf.download 呼叫，於執行時解析)。"""
+    import yfinance
+
+    yfinance.download = lambda *args, **kwargs: fake_download(*args, latency=latency, **kwargs)
+
+
+def share_script_cache():
+    """
+    真實伺服器的 Runtime 僅有一個 ScriptCache，腳本只編譯一次；AppTest 則每次 rerun 都重新編譯。
+    改為程序內共用一份已編譯的 bytecode，避免壓測量到伺服器不存在的編譯成本
+    (多執行緒同時 compile() 在部分 Python 版本也不安全)。
+    """
+    from streamlit.runtime.scriptrunner import script_cache
+
+    shared_cache = script_cache.ScriptCache()
+    original_get_bytecode = script_cache.ScriptCache.get_bytecode
+    script_cache.ScriptCache.get_bytecode = lambda self, script_path: original_get_bytecode(shared_cache, script_path)
+
+
+# ==============================================================================
+# 2. 模擬 session
+# ==============================================================================
+
+def _rss_mb():
+    """目前程序的 RSS (MB)；非 Linux 環境以峰值代替。"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return _peak_rss_mb()
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _find_widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def run_session(session_id, iterations, timeout, latencies, errors, barrier):
+    """
+    單一模擬 session：每次迭代切換標的與週期後點擊掃描按鈕，量測一次完整 rerun 的時間。
+    """
+    from streamlit.testing.v1 import AppTest
+
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        at.run()
+    except Exception as e:
+        errors.append(e)
+        barrier.abort()  # 避免其他 session 永久等待
+        return
+    try:
+        barrier.wait()  # 所有 session 就緒後同時開始 (模擬開盤瞬間的尖峰)
+    except threading.BrokenBarrierError:
+        pass
+
+    # 每個 session 以不同偏移輪替標的與週期
+    plan = itertools.islice(
+        zip(itertools.cycle(SYMBOLS[session_id % len(SYMBOLS):] + SYMBOLS[:session_id % len(SYMBOLS)]),
+            itertools.cycle(TIMEFRAMES[session_id % len(TIMEFRAMES):] + TIMEFRAMES[:session_id % len(TIMEFRAMES)])),
+        iterations,
+    )
+    for symbol, timeframe in plan:
+        try:
+            at.sidebar.text_input(key="sidebar_search_input").set_value(symbol)
+            _find_widget(at.sidebar.radio, "分析週期").set_value(timeframe)
+            _find_widget(at.sidebar.button, "📊 執行AI戰術掃描").click()
+
+            started = time.perf_counter()
+            at.run()
+            elapsed = time.perf_counter() - started
+        except Exception as e:
+            errors.append(e)
+            continue
+        # 失敗的 rerun (例外，或以「❌」狀態訊息結束的數據錯誤路徑) 通常提早結束，不計入延遲分布，另行統計
+        # Streamlit 會將訊息開頭的 emoji 轉為 icon，兩者都要檢查
+        failed = [m.value for m in (*at.error, *at.info) if m.icon == "❌" or str(m.value).startswith("❌")]
+        if at.exception:
+            errors.append(at.exception[0].value)
+        elif failed:
+            errors.append(failed[0])
+        else:
+            latencies.append(elapsed)
+
+
+def run_worker(args):
+    """
+    工作程序：於同一程序內以執行緒啟動多個 session (共享該程序的 st.cache_data)。
+    """
+    sessions, iterations, timeout, latency, shared_cache_path = args
+    os.environ["OCTS_SHARED_CACHE"] = shared_cache_path
+    install_fake_downloader(latency)
+    share_script_cache()
+
+    latencies, errors = [], []
+    barrier = threading.Barrier(len(sessions))
+    threads = [
+        threading.Thread(target=run_session, args=(sid, iterations, timeout, latencies, errors, barrier))
+        for sid in sessions
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return {
+        "pid": os.getpid(),
+        "sessions": len(sessions),
+        "latencies": latencies,
+        "errors": errors,
+        "elapsed": time.perf_counter() - started,
+        # 每個 session 的初次載入也會呼叫 fetch_data (失敗的 rerun 也已呼叫)
+        "fetches": len(latencies) + len(errors) + len(sessions),
+        "downloads": _download_calls,
+        "rss_mb": _rss_mb(),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+# ==============================================================================
+# 3. 併發擴增與報告
+# ==============================================================================
+
+def _shared_cache_totals(path):
+    """彙總 app3.0.py 共享快取 stats 表 (所有程序、所有類別)。"""
+    if not os.path.exists(path):
+        return {"cross_hits": 0, "lookups": 0}
+    with sqlite3.connect(path) as conn:
+        hits, cross_hits, misses = conn.execute(
+            "SELECT COALESCE(SUM(hits), 0), COALESCE(SUM(cross_hits), 0), COALESCE(SUM(misses), 0) FROM stats"
+        ).fetchone()
+    return {"cross_hits": cross_hits, "lookups": hits + misses}
+
+
+def run_level(n_sessions, processes, iterations, timeout, latency):
+    """以 n_sessions 個併發 session (分散於多個全新工作程序) 執行一級測試。"""
+    processes = max(1, min(processes, n_sessions))
+    groups = [list(range(n_sessions))[p::processes] for p in range(processes)]
+
+    # 每一級使用全新程序與全新的共享快取，避免前一級的快取與記憶體影響結果
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        shared_cache_path = os.path.join(cache_dir, "shared_cache.sqlite")
+        started = time.perf_counter()
+        with ctx.Pool(processes) as pool:
+            workers = pool.map(run_worker, [(g, iterations, timeout, latency, shared_cache_path) for g in groups])
+            # 讓工作程序正常結束 (而非 terminate)，app3.0.py 才會寫出節流中尚未寫入的快取統計
+            pool.close()
+            pool.join()
+        wall = time.perf_counter() - started
+        shared = _shared_cache_totals(shared_cache_path)
+
+    latencies = np.array([x for w in workers for x in w["latencies"]])
+    fetches = sum(w["fetches"] for w in workers)
+    downloads = sum(w["downloads"] for w in workers)
+    return {
+        "sessions": n_sessions,
+        "processes": processes,
+        "requests": len(latencies),
+        "failed": sum(len(w["errors"]) for w in workers),
+        "p50_ms": np.percentile(latencies, 50) * 1000 if len(latencies) else float("nan"),
+        "p99_ms": np.percentile(latencies, 99) * 1000 if len(latencies) else float("nan"),
+        "throughput": len(latencies) / max(w["elapsed"] for w in workers),
+        "cache_hit_rate": 1 - downloads / fetches if fetches else float("nan"),
+        "cross_hit_rate": shared["cross_hits"] / shared["lookups"] if shared["lookups"] else float("nan"),
+        "first_error": next((w["errors"][0] for w in workers if w["errors"]), ""),
+        "rss_mb": [round(w["rss_mb"], 1) for w in workers],
+        "peak_rss_mb": [round(w["peak_rss_mb"], 1) for w in workers],
+        "wall_s": wall,
+    }
+
+
+def print_report(results):
+    header = f"{'sessions':>8} {'procs':>5} {'reqs':>6} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8} {'hit%':>6} {'xhit%':>6} {'failed':>6}  RSS MB (now / peak per process)"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        rss = ", ".join(f"{now:.0f}/{peak:.0f}" for now, peak in zip(r["rss_mb"], r["peak_rss_mb"]))
+        print(f"{r['sessions']:>8} {r['processes']:>5} {r['requests']:>6} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} "
+              f"{r['throughput']:>8.2f} {r['cache_hit_rate'] * 100:>5.1f}% {r['cross_hit_rate'] * 100:>5.1f}% {r['failed']:>6}  {rss}")
+    errors = [r["first_error"] for r in results if r["first_error"]]
+    if errors:
+        print(f"\n⚠️ 首個失敗：{str(errors[0]).splitlines()[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="O.C.T.S. 併發 session 壓力測試")
+    parser.add_argument("--sessions", default="1,4,16", help="逐級測試的併發 session 數 (逗號分隔)")
+    parser.add_argument("--iterations", type=int, default=8, help="每個 session 的掃描次數")
+    parser.add_argument("--processes", type=int, default=1, help="工作程序數 (模擬多個 Streamlit 副本)")
+    parser.add_argument("--latency", type=float, default=0.0, help="假下載器的模擬網路延遲 (秒)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="單次 rerun 的逾時秒數")
+    args = parser.parse_args()
+
+    results = []
+    for n_sessions in [int(x) for x in args.sessions.split(",")]:
+        results.append(run_level(n_sessions, args.processes, args.iterations, args.timeout, args.latency))
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
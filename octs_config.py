@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""
+O.C.T.S. 共用設定
+
+app3.0.py 與 loadtest.py 共同引用的設定，僅此一份定義，避免兩邊不同步。
+"""
+
+# 週期名稱 → (YFinance Period, YFinance Interval)
+PERIOD_MAP = {
+    "30 分": ("60d", "30m"),
+    "4 小時": ("1y", "60m"),
+    "1 日": ("5y", "1d"),
+    "1 週": ("max", "1wk")
+}
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+O.C.T.S. 數據匯出讀寫 (Arrow IPC / Parquet)
+
+app3.0.py 匯出的指標數據與掃描結果皆由本模組寫入；研究用 notebook 直接 import 本模組讀取，
+不需執行 Streamlit 頁面。
+
+    from octs_export import load_indicator_frame
+    df = load_indicator_frame("exports/indicators/2330.TW_1d.arrow",
+                              columns=["Close", "RSI"], start="2024-01-01")
+"""
+
+import os
+import re
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+EXPORT_DIR = "exports"
+EXPORT_FORMATS = {"Parquet": "parquet", "Arrow IPC": "arrow"}
+EXPORT_INDEX_COLUMN = "Datetime"
+EXPORT_ROW_GROUP_SIZE = 1024  # Parquet row group 列數：依時間區間讀取時可跳過區間外的 row group
+
+
+def export_path(symbol, interval, fmt, kind="indicators"):
+    """依標的與週期產生匯出檔案路徑 (exports/<kind>/<symbol>_<interval>.<fmt>)。"""
+    safe_symbol = re.sub(r'[^0-9A-Za-z_.-]', '_', symbol)
+    return os.path.join(EXPORT_DIR, kind, f"{safe_symbol}_{interval}.{fmt}")
+
+
+def frame_to_arrow(df):
+    """將以時間為索引的指標數據轉為 Arrow Table，索引轉存為 Datetime 欄位。"""
+    frame = df.rename_axis(EXPORT_INDEX_COLUMN).reset_index()
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def write_arrow_table(table, path, fmt):
+    """
+    原子寫入 Arrow Table：先寫暫存檔再以 os.replace 覆蓋，讀取端不會讀到半寫入的檔案。
+    Arrow IPC 不壓縮，讀取端才能以 memory map 零拷貝載入。
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        if fmt == "arrow":
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+        else:
+            pq.write_table(table, tmp_path, compression="snappy", row_group_size=EXPORT_ROW_GROUP_SIZE)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def _arrow_time_bound(value, arrow_type):
+    """將查詢起訖時間轉為與 Datetime 欄位相同型別 (含時區) 的 Arrow 純量。"""
+    ts = pd.Timestamp(value)
+    tz = getattr(arrow_type, "tz", None)
+    if tz and ts.tzinfo is None:
+        ts = ts.tz_localize(tz)
+    elif not tz and ts.tzinfo is not None:
+        ts = ts.tz_convert(None)
+    return pa.scalar(ts, type=arrow_type)
+
+
+def load_indicator_frame(path, columns=None, start=None, end=None):
+    """
+    讀取匯出的指標數據，僅載入需要的欄位與時間區間。
+    Arrow IPC 以 memory map 零拷貝讀取；Parquet 僅解碼被投影的欄位。
+    """
+    if path.endswith(".arrow"):
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        if columns is not None:
+            table = table.select([EXPORT_INDEX_COLUMN] + list(columns))
+        time_type = table.schema.field(EXPORT_INDEX_COLUMN).type
+        if start is not None:
+            table = table.filter(pc.greater_equal(table[EXPORT_INDEX_COLUMN], _arrow_time_bound(start, time_type)))
+        if end is not None:
+            table = table.filter(pc.less_equal(table[EXPORT_INDEX_COLUMN], _arrow_time_bound(end, time_type)))
+    else:
+        # 時間區間以 filters 下推至 Parquet 讀取：依 row group 統計值跳過區間外的 row group
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        time_type = parquet_file.schema_arrow.field(EXPORT_INDEX_COLUMN).type
+        filters = []
+        if start is not None:
+            filters.append((EXPORT_INDEX_COLUMN, ">=", _arrow_time_bound(start, time_type)))
+        if end is not None:
+            filters.append((EXPORT_INDEX_COLUMN, "<=", _arrow_time_bound(end, time_type)))
+        read_columns = [EXPORT_INDEX_COLUMN] + list(columns) if columns is not None else None
+        table = pq.read_table(path, columns=read_columns, filters=filters or None, memory_map=True)
+
+    return table.to_pandas().set_index(EXPORT_INDEX_COLUMN)
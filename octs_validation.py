@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+O.C.T.S. 數據驗證與正規化
+
+指標計算前對 YFinance (或即時來源) 的 OHLCV 數據做向量化檢查與正規化，回傳正規化後的數據與各項檢查計數。
+app3.0.py 與測試皆直接 import 本模組。
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# 市場時區；OTHER 為無法辨識的代號 (指數 ^TWII、其他交易所 7203.T / 0700.HK、期貨等)，保留數據原本的時區
+MARKET_TIMEZONES = {"TW": "Asia/Taipei", "US": "America/New_York", "CRYPTO": "UTC", "OTHER": None}
+# 盤中交易時段 [開盤, 收盤) (交易所當地時間，分鐘)；None 表示不過濾 (加密貨幣 24/7，或交易時段未知)
+MARKET_SESSIONS = {"TW": (9*60, 13*60 + 30), "US": (9*60 + 30, 16*60), "CRYPTO": None, "OTHER": None}
+# 加密貨幣代號的計價幣別後綴 (YFinance 格式如 BTC-USD)；BRK-B 之類含 '-' 的美股不受影響
+CRYPTO_QUOTE_SUFFIXES = ("-USD", "-USDT", "-USDC", "-BTC", "-ETH", "-EUR", "-TWD")
+# 美股代號：1-5 個英文字母，可帶股票類別後綴 (BRK-B)
+US_SYMBOL_PATTERN = re.compile(r"[A-Z]{1,5}(-[A-Z])?")
+SPLIT_RATIOS = np.array([2, 3, 4, 5, 10, 20, 1/2, 1/3, 1/4, 1/5, 1/10, 1/20])
+VALIDATION_CHECKS = {
+    'rows_in': "原始 K 線數",
+    'flattened_columns': "攤平 MultiIndex 欄位",
+    'out_of_order': "亂序時間",
+    'duplicates': "重複時間 (已剔除)",
+    'missing_values': "OHLC 缺值 (已剔除)",
+    'invalid_prices': "不合理價格 (已剔除)",
+    'inconsistent_ohlc': "高低價不一致 (已修正高低價)",
+    'zero_volume': "零成交量",
+    'stale_bars': "停滯 K 線 (已剔除)",
+    'outside_session': "交易時段外 (已剔除)",
+    'suspected_splits': "疑似未還原分割",
+    'adjustment_breaks': "還原價跳空",
+    'rows_out': "有效 K 線數",
+}
+
+
+def market_of(symbol):
+    """
+    依代號判斷市場：台股 (.TW/.TWO)、加密貨幣 (計價幣別後綴，如 -USD)、美股 (無後綴的英文代號)，
+    其餘 (指數、其他交易所、期貨等) 為 OTHER：不轉換時區、不依交易時段剔除 K 線。
+    """
+    symbol = symbol.upper()
+    if symbol.endswith(('.TW', '.TWO')):
+        return "TW"
+    if symbol.endswith(CRYPTO_QUOTE_SUFFIXES):
+        return "CRYPTO"
+    if US_SYMBOL_PATTERN.fullmatch(symbol):
+        return "US"
+    return "OTHER"
+
+
+def _flatten_ohlcv_columns(data):
+    """新版 yfinance 回傳 (Price, Ticker) MultiIndex 欄位：取出含 OHLC 名稱的那一層。"""
+    for level in range(data.columns.nlevels):
+        values = data.columns.get_level_values(level)
+        if 'Close' in values:
+            return data.set_axis(values, axis=1)
+    return data
+
+
+def normalize_ohlcv(data, symbol, interval):
+    """
+    指標計算前的數據驗證與正規化：
+    - 攤平 MultiIndex 欄位、依市場統一時區 (台股 Asia/Taipei、美股 America/New_York、加密貨幣 UTC；
+      無法辨識的市場保留原時區)
+    - 剔除亂序/重複時間、缺值或不合理價格、交易時段外與週末 K 線 (僅限已知交易時段的台股與美股)、
+      無成交且價格未變動的停滯 K 線
+    - 高低價未涵蓋開收盤價的 K 線：將最高/最低價修正為涵蓋開收盤價 (保留該 K 線)
+    - 檢查疑似未還原的分割/配息跳空 (僅計數，不修改數據)
+    所有檢查以向量化遮罩一次完成，最後僅以單次 take 產生結果；回傳 (df, 各項檢查計數)。
+    """
+    checks = {name: 0 for name in VALIDATION_CHECKS}
+    checks['rows_in'] = len(data)
+    if data.empty:
+        return data, checks
+
+    if isinstance(data.columns, pd.MultiIndex):
+        data = _flatten_ohlcv_columns(data)
+        checks['flattened_columns'] = 1
+    if not {'Open', 'High', 'Low', 'Close'}.issubset(data.columns):
+        raise ValueError(f"缺少 OHLC 欄位: {list(data.columns)}")
+    if 'Volume' not in data.columns:
+        data = data.assign(Volume=0.0)
+
+    # --- 時區：naive 視為交易所當地時間，tz-aware 轉為交易所時區 ---
+    market = market_of(symbol)
+    index = data.index if isinstance(data.index, pd.DatetimeIndex) else pd.DatetimeIndex(data.index)
+    tz = MARKET_TIMEZONES[market]
+    if tz is not None:
+        index = index.tz_localize(tz) if index.tz is None else index.tz_convert(tz)
+
+    # --- 排序 (僅在亂序時) 與重複時間 (保留最後一筆) ---
+    stamps = index.asi8
+    order = np.arange(len(stamps))
+    if not index.is_monotonic_increasing:
+        checks['out_of_order'] = int((np.diff(stamps) < 0).sum())
+        order = np.argsort(stamps, kind='stable')
+        stamps = stamps[order]
+    duplicated = np.zeros(len(stamps), dtype=bool)
+    duplicated[:-1] = stamps[:-1] == stamps[1:]
+    checks['duplicates'] = int(duplicated.sum())
+
+    o, h, l, c, v = (data[col].to_numpy(dtype=np.float64)[order] for col in ('Open', 'High', 'Low', 'Close', 'Volume'))
+    sorted_index = index[order]
+
+    # --- 價格與成交量 ---
+    missing = np.isnan(o) | np.isnan(h) | np.isnan(l) | np.isnan(c)
+    invalid = ~missing & ((np.fmin(np.fmin(o, h), np.fmin(l, c)) <= 0) | (h < l))
+    checks['missing_values'] = int(missing.sum())
+    checks['invalid_prices'] = int(invalid.sum())
+    inconsistent = ~missing & ~invalid & ((h < np.fmax(o, c)) | (l > np.fmin(o, c)))
+    checks['inconsistent_ohlc'] = int(inconsistent.sum())
+
+    v = np.nan_to_num(v, nan=0.0)
+    zero_volume = v <= 0
+    checks['zero_volume'] = int(zero_volume.sum())
+    prev_close = np.concatenate([[np.nan], c[:-1]])
+    stale = zero_volume & (o == h) & (h == l) & (l == c) & (c == prev_close)
+    checks['stale_bars'] = int(stale.sum())
+
+    # --- 交易時段 (週末與盤中時段外) ---
+    outside = np.zeros(len(stamps), dtype=bool)
+    session = MARKET_SESSIONS[market]
+    if session is not None:
+        outside = sorted_index.dayofweek.to_numpy() >= 5
+        if interval[-1] in 'mh' and not interval.endswith('mo'):
+            minutes = sorted_index.hour.to_numpy() * 60 + sorted_index.minute.to_numpy()
+            outside |= (minutes < session[0]) | (minutes >= session[1])
+    checks['outside_session'] = int(outside.sum())
+
+    keep = ~(duplicated | missing | invalid | stale | outside)
+
+    # --- 分割/配息還原檢查 (僅計數) ---
+    kept_close = c[keep]
+    if len(kept_close) > 1:
+        jumps = np.abs(np.log(kept_close[1:] / kept_close[:-1]))
+        split_ratios = np.log(SPLIT_RATIOS)
+        near_split = (np.abs(jumps[:, None] - split_ratios[None, :]) < 0.03).any(axis=1)
+        checks['suspected_splits'] = int((near_split & (jumps > np.log(1.8))).sum())
+    if 'Adj Close' in data.columns:
+        adj = data['Adj Close'].to_numpy(dtype=np.float64)[order][keep]
+        adj_ratio = np.log(adj / kept_close)
+        checks['adjustment_breaks'] = int((np.abs(np.diff(adj_ratio)) > np.log(1.5)).sum())
+
+    df = data.take(order[keep])
+    df.index = sorted_index[keep]
+    df['Volume'] = v[keep]
+    if checks['inconsistent_ohlc']:
+        df['High'] = np.fmax(h, np.fmax(o, c))[keep]
+        df['Low'] = np.fmin(l, np.fmin(o, c))[keep]
+    checks['rows_out'] = len(df)
+    return df, checks
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+O.C.T.S. 成交量分佈 (Volume Profile) 引擎
+
+以 bincount 向量化累加最近 VP_WINDOW 根 K 線的成交量，並支援只處理新增 K 線的增量更新；
+推導 POC 與價值區 (VAH / VAL) 作為支撐壓力。app3.0.py 與測試皆直接 import 本模組。
+"""
+
+import numpy as np
+
+VP_WINDOW = 120        # 計算視窗 (K 線數)
+VP_BINS = 48           # 價格區間數
+VP_VALUE_AREA = 0.70   # 價值區涵蓋的成交量比例
+
+
+def _volume_profile_bins(prices, edges):
+    """將價格對應至價格區間編號 (超出範圍者夾在首尾區間)。"""
+    return np.clip(np.searchsorted(edges, prices, side='right') - 1, 0, len(edges) - 2)
+
+
+def _window_range(recent):
+    """視窗內的最低價與最高價 (價格完全不動時避免零寬度區間)。"""
+    low, high = float(recent['Low'].min()), float(recent['High'].max())
+    if high <= low:
+        high = low * 1.001 + 1e-9
+    return low, high
+
+
+def _edges_stale(edges, low, high):
+    """
+    既有價格區間是否已不適用：視窗價格超出區間，或視窗高低點已向內收斂超過一個區間寬度
+    (此時重建可恢復解析度，且與重新計算的結果相差不超過一個區間)。
+    """
+    width = edges[1] - edges[0]
+    return low < edges[0] or high > edges[-1] or low - edges[0] > width or edges[-1] - high > width
+
+
+def build_volume_profile(df, window=VP_WINDOW, bins=VP_BINS):
+    """
+    成交量分佈 (Volume Profile)：將最近 window 根 K 線的成交量依典型價格 (H+L+C)/3
+    以 bincount 向量化累加至 bins 個價格區間。
+    """
+    recent = df.iloc[-window:]
+    low, high = _window_range(recent)
+
+    edges = np.linspace(low, high, bins + 1)
+    typical = ((recent['High'] + recent['Low'] + recent['Close']) / 3).to_numpy(dtype=float)
+    volumes = recent['Volume'].to_numpy(dtype=float)
+    bar_bins = _volume_profile_bins(typical, edges)
+
+    return {
+        "edges": edges,
+        "hist": np.bincount(bar_bins, weights=volumes, minlength=bins),
+        "bar_bins": bar_bins,
+        "bar_volumes": volumes,
+        "last_time": recent.index[-1],
+        "window": window,
+    }
+
+
+def update_volume_profile(profile, df, window=VP_WINDOW, bins=VP_BINS):
+    """
+    增量更新成交量分佈：只處理新增 (或最後一根被更新) 的 K 線，並移除滑出視窗的 K 線，
+    累加成本與新增 K 線數成正比，與歷史長度無關。
+    視窗高低點超出既有價格區間、或向內收斂超過一個區間寬度，以及參數變動時才整體重建
+    (成本以 window 為上限)。
+    """
+    if (profile is None or profile['window'] != window or len(profile['hist']) != bins
+            or profile['last_time'] not in df.index):
+        return build_volume_profile(df, window, bins)
+
+    edges = profile['edges']
+    if _edges_stale(edges, *_window_range(df.iloc[-window:])):
+        return build_volume_profile(df, window, bins)
+
+    # 最後一根 K 線可能仍在更新中：先扣除其舊貢獻，再連同新 K 線一併加入
+    new_bars = df.loc[df.index >= profile['last_time']]
+    typical = ((new_bars['High'] + new_bars['Low'] + new_bars['Close']) / 3).to_numpy(dtype=float)
+    volumes = new_bars['Volume'].to_numpy(dtype=float)
+    new_bins = _volume_profile_bins(typical, edges)
+    hist = profile['hist'].copy()
+    hist[profile['bar_bins'][-1]] -= profile['bar_volumes'][-1]
+    hist += np.bincount(new_bins, weights=volumes, minlength=bins)
+
+    bar_bins = np.concatenate([profile['bar_bins'][:-1], new_bins])
+    bar_volumes = np.concatenate([profile['bar_volumes'][:-1], volumes])
+    expired = len(bar_bins) - window
+    if expired > 0:
+        hist -= np.bincount(bar_bins[:expired], weights=bar_volumes[:expired], minlength=bins)
+        bar_bins, bar_volumes = bar_bins[expired:], bar_volumes[expired:]
+
+    return {
+        "edges": edges,
+        "hist": np.maximum(hist, 0),  # 消除浮點誤差造成的微小負值
+        "bar_bins": bar_bins,
+        "bar_volumes": bar_volumes,
+        "last_time": new_bars.index[-1],
+        "window": window,
+    }
+
+
+def volume_profile_levels(profile, value_area=VP_VALUE_AREA):
+    """
+    由成交量分佈推導關鍵價位：
+    - POC (Point of Control)：成交量最大的價格區間
+    - VAH / VAL：自 POC 起每次向成交量較大的相鄰區間擴展一格，直到涵蓋 value_area (預設 70%)
+      的成交量，所得連續價值區的上下緣
+    """
+    hist = profile['hist']
+    edges = profile['edges']
+    centers = (edges[:-1] + edges[1:]) / 2
+    total = hist.sum()
+    if total <= 0:
+        return {}
+
+    poc = int(np.argmax(hist))
+    lo = hi = poc
+    covered = hist[poc]
+    while covered < total * value_area and (lo > 0 or hi < len(hist) - 1):
+        below = hist[lo - 1] if lo > 0 else -1.0
+        above = hist[hi + 1] if hi < len(hist) - 1 else -1.0
+        if above >= below:
+            hi += 1
+            covered += above
+        else:
+            lo -= 1
+            covered += below
+
+    return {
+        "POC": centers[poc],
+        "VAH": edges[hi + 1],
+        "VAL": edges[lo],
+    }
+
+
+def scan_volume_profiles(frames, profiles=None, window=VP_WINDOW, bins=VP_BINS):
+    """
+    對整個觀察清單 ({symbol: df}) 更新成交量分佈並回傳各標的關鍵價位；
+    沿用上次的 profiles 時每個標的僅處理新增 K 線。
+    """
+    profiles = {} if profiles is None else profiles
+    levels = {}
+    for symbol, df in frames.items():
+        if df.empty:
+            continue
+        profiles[symbol] = update_volume_profile(profiles.get(symbol), df, window, bins)
+        levels[symbol] = volume_profile_levels(profiles[symbol])
+    return levels, profiles
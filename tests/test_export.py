@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""octs_export：Arrow IPC / Parquet 寫入後依欄位與時間區間讀回。"""
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from octs_export import EXPORT_ROW_GROUP_SIZE, frame_to_arrow, load_indicator_frame, write_arrow_table
+
+
+def _frame(n=5000):
+    index = pd.date_range("2026-01-01 09:00", periods=n, freq="30min", tz="Asia/Taipei")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"Close": rng.normal(100, 1, n), "RSI": rng.uniform(0, 100, n)},
+                        index=index.rename("Datetime"))
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_load_indicator_frame_projects_columns_and_time_range(tmp_path, fmt):
+    df = _frame()
+    path = write_arrow_table(frame_to_arrow(df), str(tmp_path / f"x.{fmt}"), fmt)
+
+    start, end = df.index[1200], df.index[1800]
+    loaded = load_indicator_frame(path, columns=["RSI"], start=start, end=end)
+    pd.testing.assert_frame_equal(loaded, df.loc[start:end, ["RSI"]], check_freq=False)
+
+    # 未含時區的起訖時間視為與數據相同時區
+    naive = load_indicator_frame(path, start=start.tz_localize(None), end=end.tz_localize(None))
+    assert naive.index[0] == start and naive.index[-1] == end
+
+
+def test_parquet_export_is_split_into_row_groups(tmp_path):
+    df = _frame()
+    path = write_arrow_table(frame_to_arrow(df), str(tmp_path / "x.parquet"), "parquet")
+    assert pq.ParquetFile(path).num_row_groups == -(-len(df) // EXPORT_ROW_GROUP_SIZE)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""octs_validation：市場判斷與 normalize_ohlcv 的各項檢查。"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from octs_validation import VALIDATION_CHECKS, market_of, normalize_ohlcv
+
+
+def _bars(index, close=None):
+    n = len(index)
+    close = np.linspace(100, 110, n) if close is None else np.asarray(close, dtype=float)
+    return pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": np.full(n, 1_000.0)},
+        index=index,
+    )
+
+
+def _intraday(start, tz, days=3, freq="30min"):
+    """連續 days 天、每天 24 小時的盤中 K 線 (含盤後與週末)。"""
+    return pd.date_range(start, periods=days * 48, freq=freq, tz=tz)
+
+
+@pytest.mark.parametrize("symbol, market", [
+    ("2330.TW", "TW"), ("6488.TWO", "TW"),
+    ("AAPL", "US"), ("BRK-B", "US"), ("brk-b", "US"),
+    ("BTC-USD", "CRYPTO"), ("ETH-USDT", "CRYPTO"), ("SOL-BTC", "CRYPTO"),
+    ("^TWII", "OTHER"), ("7203.T", "OTHER"), ("0700.HK", "OTHER"), ("ES=F", "OTHER"),
+])
+def test_market_of(symbol, market):
+    assert market_of(symbol) == market
+
+
+def test_empty_input_returns_zero_checks():
+    df, checks = normalize_ohlcv(pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"]), "AAPL", "1d")
+    assert df.empty
+    assert set(checks) == set(VALIDATION_CHECKS) and checks["rows_in"] == 0
+
+
+def test_missing_ohlc_columns_raise():
+    with pytest.raises(ValueError):
+        normalize_ohlcv(pd.DataFrame({"Close": [1.0]}, index=pd.date_range("2026-01-05", periods=1)), "AAPL", "1d")
+
+
+def test_multiindex_columns_are_flattened_and_volume_defaults_to_zero():
+    data = _bars(pd.date_range("2026-01-05", periods=5, freq="B")).drop(columns="Volume")
+    data.columns = pd.MultiIndex.from_product([data.columns, ["AAPL"]], names=["Price", "Ticker"])
+    df, checks = normalize_ohlcv(data, "AAPL", "1d")
+    assert checks["flattened_columns"] == 1
+    assert list(df.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert (df["Volume"] == 0).all() and checks["zero_volume"] == 5
+
+
+def test_tw_session_filter_and_timezone():
+    data = _bars(_intraday("2026-01-05 00:00", "Asia/Taipei"))  # 週一至週三
+    df, checks = normalize_ohlcv(data, "2330.TW", "30m")
+    assert str(df.index.tz) == "Asia/Taipei"
+    minutes = df.index.hour * 60 + df.index.minute
+    assert minutes.min() == 9 * 60 and minutes.max() == 13 * 60  # 13:30 (收盤) 之後剔除
+    assert checks["rows_out"] == 3 * 9
+    assert checks["outside_session"] == checks["rows_in"] - checks["rows_out"]
+
+
+def test_us_session_is_applied_in_new_york_time():
+    data = _bars(_intraday("2026-01-05 00:00", "UTC"))
+    df, _ = normalize_ohlcv(data, "AAPL", "30m")
+    assert str(df.index.tz) == "America/New_York"
+    minutes = df.index.hour * 60 + df.index.minute
+    assert minutes.min() == 9 * 60 + 30 and minutes.max() == 15 * 60 + 30
+
+
+@pytest.mark.parametrize("symbol", ["^TWII", "7203.T", "0700.HK"])
+def test_unknown_market_keeps_all_bars_and_timezone(symbol):
+    # 台北時段的 30 分 K 線：不得套用紐約交易時段
+    index = pd.date_range("2026-01-05 09:00", periods=9, freq="30min", tz="Asia/Taipei")
+    df, checks = normalize_ohlcv(_bars(index), symbol, "30m")
+    assert checks["rows_out"] == 9 and checks["outside_session"] == 0
+    assert str(df.index.tz) == "Asia/Taipei"
+
+
+def test_crypto_keeps_weekend_and_overnight_bars():
+    data = _bars(_intraday("2026-01-03 00:00", "UTC", days=2))  # 週六、週日
+    df, checks = normalize_ohlcv(data, "BTC-USD", "30m")
+    assert checks["rows_out"] == len(data) and str(df.index.tz) == "UTC"
+
+
+def test_daily_weekend_bars_are_dropped_for_stocks():
+    data = _bars(pd.date_range("2026-01-05", periods=14, freq="D"))
+    df, checks = normalize_ohlcv(data, "AAPL", "1d")
+    assert checks["outside_session"] == 4 and (df.index.dayofweek < 5).all()
+
+
+def test_out_of_order_and_duplicates_keep_last():
+    index = pd.DatetimeIndex(["2026-01-07", "2026-01-05", "2026-01-06", "2026-01-06"])
+    data = _bars(index, close=[103, 101, 102, 202])
+    df, checks = normalize_ohlcv(data, "AAPL", "1d")
+    assert checks["out_of_order"] == 1 and checks["duplicates"] == 1
+    assert df.index.is_monotonic_increasing
+    assert df["Close"].tolist() == [101, 202, 103]
+
+
+def test_missing_and_invalid_prices_are_dropped():
+    data = _bars(pd.date_range("2026-01-05", periods=5, freq="B"))
+    data.iloc[1, data.columns.get_loc("Close")] = np.nan
+    data.iloc[2, data.columns.get_loc("Low")] = -1.0
+    data.iloc[3, data.columns.get_loc("High")] = data["Low"].iloc[3] - 5  # High < Low
+    df, checks = normalize_ohlcv(data, "AAPL", "1d")
+    assert checks["missing_values"] == 1 and checks["invalid_prices"] == 2
+    assert checks["rows_out"] == 2
+
+
+def test_inconsistent_high_low_are_clipped_to_open_close():
+    data = _bars(pd.date_range("2026-01-05", periods=3, freq="B"), close=[100, 100, 100])
+    data.iloc[1, data.columns.get_loc("Open")] = 100.5
+    data.iloc[1, data.columns.get_loc("High")] = 100.2  # 低於開盤價
+    data.iloc[2, data.columns.get_loc("Low")] = 100.1   # 高於收盤價
+    df, checks = normalize_ohlcv(data, "AAPL", "1d")
+    assert checks["inconsistent_ohlc"] == 2 and checks["rows_out"] == 3
+    assert df["High"].iloc[1] == 100.5 and df["Low"].iloc[2] == 100
+    assert (df["High"] >= df[["Open", "Close"]].max(axis=1)).all()
+    assert (df["Low"] <= df[["Open", "Close"]].min(axis=1)).all()
+
+
+def test_stale_bars_are_dropped():
+    data = _bars(pd.date_range("2026-01-05", periods=4, freq="B"), close=[100, 100, 100, 101])
+    data.iloc[1, :] = [100, 100, 100, 100, 0]  # 無成交且價格與前收相同
+    df, checks = normalize_ohlcv(data, "AAPL", "1d")
+    assert checks["zero_volume"] == 1 and checks["stale_bars"] == 1
+    assert checks["rows_out"] == 3
+
+
+def test_split_and_adjustment_checks_only_count():
+    close = np.array([100.0, 101, 50.5, 51, 52])  # 2:1 分割未還原
+    data = _bars(pd.date_range("2026-01-05", periods=5, freq="B"), close=close)
+    data["Adj Close"] = close * np.array([1, 1, 2, 2, 2])
+    df, checks = normalize_ohlcv(data, "AAPL", "1d")
+    assert checks["suspected_splits"] == 1 and checks["adjustment_breaks"] == 1
+    assert checks["rows_out"] == 5
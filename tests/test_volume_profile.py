@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""octs_volume_profile：增量更新與重新計算的一致性、價值區由 POC 向外擴展。"""
+
+import numpy as np
+import pandas as pd
+
+from octs_volume_profile import (
+    _volume_profile_bins,
+    build_volume_profile,
+    scan_volume_profiles,
+    update_volume_profile,
+    volume_profile_levels,
+)
+
+
+def _bars(n, seed=0, drift=0.0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(drift, 0.01, n)))
+    open_ = close * (1 + rng.normal(0, 0.003, n))
+    return pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.004, n))),
+            "Low": np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.004, n))),
+            "Close": close,
+            "Volume": rng.integers(1_000, 100_000, n).astype(float),
+        },
+        index=pd.date_range("2026-01-01", periods=n, freq="30min"),
+    )
+
+
+def _replay(df, start, step=1, window=120, bins=48):
+    """逐步餵入 K 線 (每步新增 step 根) 並於每步檢查增量結果。"""
+    profile = build_volume_profile(df.iloc[:start], window, bins)
+    for end in range(start + step, len(df) + 1, step):
+        profile = update_volume_profile(profile, df.iloc[:end], window, bins)
+        yield df.iloc[:end], profile
+
+
+def test_incremental_histogram_matches_bincount_over_same_edges():
+    df = _bars(800)
+    for seen, profile in _replay(df, 150, step=3):
+        recent = seen.iloc[-120:]
+        typical = ((recent["High"] + recent["Low"] + recent["Close"]) / 3).to_numpy()
+        expected = np.bincount(_volume_profile_bins(typical, profile["edges"]),
+                               weights=recent["Volume"].to_numpy(), minlength=48)
+        np.testing.assert_allclose(profile["hist"], expected, rtol=1e-9, atol=1e-6)
+
+
+def test_incremental_profile_tracks_fresh_build():
+    # 先上漲後回落：視窗高點會滑出並向內收斂
+    df = pd.concat([_bars(400, seed=1, drift=0.003), _bars(400, seed=2, drift=-0.003)])
+    df.index = pd.date_range("2026-01-01", periods=len(df), freq="30min")
+    df.loc[df.index[400:], ["Open", "High", "Low", "Close"]] *= df["Close"].iloc[399] / df["Close"].iloc[400]
+
+    rebuilt = 0
+    for seen, profile in _replay(df, 150):
+        fresh = build_volume_profile(seen, 120, 48)
+        width = profile["edges"][1] - profile["edges"][0]
+        # 價格區間與重新計算的結果相差不超過一格 (既有區間寬度)，成交量總和一致
+        assert abs(profile["edges"][0] - fresh["edges"][0]) <= width * 1.0001
+        assert abs(profile["edges"][-1] - fresh["edges"][-1]) <= width * 1.0001
+        np.testing.assert_allclose(profile["hist"].sum(), fresh["hist"].sum(), rtol=1e-9)
+        # 區間一致 (剛重建) 時關鍵價位完全相同
+        if np.array_equal(profile["edges"], fresh["edges"]):
+            rebuilt += 1
+            assert volume_profile_levels(profile) == volume_profile_levels(fresh)
+    assert rebuilt > 1
+
+
+def test_update_rebuilds_when_range_shrinks_by_more_than_one_bin():
+    df = _bars(300)
+    profile = build_volume_profile(df.iloc[:200], 120, 48)
+    # 新 K 線集中於極窄區間，使視窗高低點向內收斂
+    flat = pd.DataFrame(
+        {"Open": 100.0, "High": 100.1, "Low": 99.9, "Close": 100.0, "Volume": 1_000.0},
+        index=pd.date_range(df.index[199] + pd.Timedelta(minutes=30), periods=120, freq="30min"),
+    )
+    seen = pd.concat([df.iloc[:200], flat])
+    updated = update_volume_profile(profile, seen, 120, 48)
+    np.testing.assert_allclose(updated["edges"], build_volume_profile(seen, 120, 48)["edges"])
+
+
+def test_value_area_expands_contiguously_from_poc():
+    # 兩端各有大量區間，但與 POC 之間隔著低量區間：價值區須自 POC 逐格向外擴展、保持連續
+    hist = np.array([30, 0, 1, 5, 40, 6, 2, 0, 30], dtype=float)
+    profile = {"edges": np.arange(len(hist) + 1, dtype=float), "hist": hist}
+
+    levels = volume_profile_levels(profile, value_area=0.4)
+    assert (levels["POC"], levels["VAL"], levels["VAH"]) == (4.5, 4.0, 6.0)
+
+    # 40 → +6 → +5 → +2 → +1 → +0 → +30 (上緣的大量區間)，下緣的 30 不納入
+    levels = volume_profile_levels(profile, value_area=0.7)
+    assert (levels["VAL"], levels["VAH"]) == (2.0, 9.0)
+
+
+def test_scan_volume_profiles_reuses_profiles_between_scans():
+    frames = {"A": _bars(300, seed=3), "B": _bars(300, seed=4)}
+    levels, profiles = scan_volume_profiles({s: df.iloc[:250] for s, df in frames.items()})
+    assert levels == {s: volume_profile_levels(build_volume_profile(df.iloc[:250])) for s, df in frames.items()}
+
+    previous = dict(profiles)
+    levels, profiles = scan_volume_profiles(frames, profiles)
+    for symbol, df in frames.items():
+        expected = update_volume_profile(previous[symbol], df)
+        np.testing.assert_allclose(profiles[symbol]["hist"], expected["hist"])
+        assert profiles[symbol]["last_time"] == df.index[-1]
+        assert levels[symbol] == volume_profile_levels(expected)